@@ -0,0 +1,208 @@
+"""
+Import of past seasons: schedule, drivers, teams and session results.
+
+    flask backfill-seasons 2018 2025
+
+Season is fetched by AsyncClient, all rounds concurrently within the
+rate limit, and stored in one transaction. Fetched rounds and imported
+seasons are recorded in checkpoint directory, so an interrupted import
+is resumed without fetching the same data again.
+
+Imported races are history, views of the game show the current season
+only. Drivers and teams not racing in the current season are inactive.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, UTC
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import insert, select
+
+from app import db
+from app.ergast_client.async_client import AsyncClient
+from app.models import CURRENT_SEASON, Competitor, Race, RaceResult
+from .competitors import COMPETITORS
+from .utils import _db_exec
+
+LOG = logging.getLogger(__name__)
+
+CHECKPOINT_DIR = "backfill_checkpoint"
+
+
+class Checkpoint(object):
+    """
+    Progress of import in directory: <season>/<round>.json with fetched
+    results of round, <season>/DONE once the season is in DB.
+    """
+
+    def __init__(self, directory):
+        self._directory = directory
+
+    def _path(self, season, name):
+        return os.path.join(self._directory, str(season), name)
+
+    def is_done(self, season):
+        return os.path.exists(self._path(season, "DONE"))
+
+    def mark_done(self, season):
+        os.makedirs(self._path(season, ""), exist_ok=True)
+        with open(self._path(season, "DONE"), "w"):
+            pass
+
+    def load_round(self, season, round):
+        try:
+            with open(self._path(season, f"{round}.json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def save_round(self, season, round, data):
+        path = self._path(season, f"{round}.json")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # complete file or none, even if interrupted while writing
+        with open(path + ".tmp", "w") as f:
+            json.dump(data, f)
+        os.replace(path + ".tmp", path)
+
+
+async def fetch_season(client, season, checkpoint):
+    """Schedule, drivers, teams and {round: results} of finished races."""
+    schedule, drivers, teams = await asyncio.gather(
+        client.get_current_schedule(),
+        client.get_all_drivers(),
+        client.get_all_constructors(),
+    )
+    races = schedule["MRData"]["RaceTable"]["Races"]
+    now = datetime.now(UTC)
+
+    async def fetch_round(race):
+        round = int(race["round"])
+        data = checkpoint.load_round(season, round)
+        if data is None:
+            data = await client.get_round_results(round, is_sprint="Sprint" in race)
+            checkpoint.save_round(season, round, data)
+        return round, data
+
+    finished = [race for race in races if Race.format_date(race) < now]
+    # failed round doesn't cancel the others, they are checkpointed for next run
+    fetched = await asyncio.gather(
+        *(fetch_round(race) for race in finished), return_exceptions=True
+    )
+    for item in fetched:
+        if isinstance(item, BaseException):
+            raise item
+    return schedule, drivers, teams, dict(fetched)
+
+
+def _classification(data, key):
+    races = data["MRData"]["RaceTable"]["Races"]
+    return [row["Driver"]["driverId"] for row in races[0][key]] if races else []
+
+
+def _round_results(data):
+    """(type, rank, driver ext_id) of results of one round."""
+    out = []
+    for type, session, key in (
+        ("QUALI", "quali", "QualifyingResults"),
+        ("SPRINT", "sprint", "SprintResults"),
+        ("FASTEST", "fastest_lap", "Results"),
+    ):
+        if session in data:
+            winner = _classification(data[session], key)[:1]
+            out += [(type, None, driver) for driver in winner]
+    podium = _classification(data["race"], "Results")[:3]
+    out += [("RACE", rank, driver) for rank, driver in enumerate(podium, start=1)]
+    return out
+
+
+def import_season(season, schedule, drivers, teams, results):
+    """Store fetched season by bulk inserts. Caller commits."""
+    stmt = select(Competitor.type, Competitor.ext_id)
+    known = set(_db_exec(stmt).all())
+    new = [
+        competitor
+        for competitor in Competitor.drivers_from_data(drivers)
+        + Competitor.teams_from_data(teams)
+        if (competitor.type, competitor.ext_id) not in known
+    ]
+    for competitor in new:
+        # didn't race in the current season, not offered for bets
+        competitor.active = False
+
+    races = Race.race_from_data(schedule)
+    for race in races:
+        # schedule of old seasons has no qualifying date
+        race.quali_date = race.quali_date or race.race_date
+    db.session.add_all(new + races)
+    db.session.flush()
+
+    stmt = select(Competitor.ext_id, Competitor.id, Competitor.code).where(
+        Competitor.type == "DRIVER"
+    )
+    driver_map = {ext_id: (id, code) for ext_id, id, code in _db_exec(stmt)}
+    rows = [
+        {
+            "type": type,
+            "rank": rank,
+            "competitor_id": driver_map[driver][0],
+            "value": driver_map[driver][1],
+            "race_id": race.id,
+        }
+        for race in races
+        if race.round in results
+        for type, rank, driver in _round_results(results[race.round])
+        if driver in driver_map
+    ]
+    if rows:
+        db.session.execute(insert(RaceResult), rows)
+    if new:
+        COMPETITORS.invalidate()
+    LOG.info(
+        "Season %s imported: %s races, %s results, %s new competitors",
+        season,
+        len(races),
+        len(rows),
+        len(new),
+    )
+    return len(races), len(rows)
+
+
+def backfill(seasons, checkpoint_dir=CHECKPOINT_DIR, client_factory=None):
+    """Import `seasons` not imported yet, return list of imported seasons."""
+    client_factory = client_factory or (lambda season: AsyncClient(year=season))
+    checkpoint = Checkpoint(checkpoint_dir)
+    imported = []
+    for season in seasons:
+        if season == CURRENT_SEASON:
+            LOG.warning("Current season is loaded by init_db.py, skipping")
+            continue
+        stmt = select(Race.id).where(Race.season == season).limit(1)
+        if checkpoint.is_done(season) or _db_exec(stmt).first():
+            LOG.info("Season %s already imported", season)
+            checkpoint.mark_done(season)
+            continue
+
+        async def fetch():
+            async with client_factory(season) as client:
+                return await fetch_season(client, season, checkpoint)
+
+        import_season(season, *asyncio.run(fetch()))
+        db.session.commit()
+        checkpoint.mark_done(season)
+        imported.append(season)
+    return imported
+
+
+@click.command("backfill-seasons")
+@click.argument("first", type=int)
+@click.argument("last", type=int)
+@click.option("--checkpoint", default=CHECKPOINT_DIR, show_default=True)
+@with_appcontext
+def backfill_command(first, last, checkpoint):
+    """Import seasons FIRST to LAST (inclusive)."""
+    imported = backfill(range(first, last + 1), checkpoint)
+    click.echo(f"Imported seasons: {', '.join(map(str, imported)) or 'none'}")
@@ -0,0 +1,71 @@
+from collections import namedtuple
+
+from app import db
+from app.models import Competitor
+from app.versioned_cache import VersionedCache
+
+CompetitorEntry = namedtuple(
+    "CompetitorEntry", ["id", "ext_id", "code", "name", "type", "active"]
+)
+
+
+class CompetitorRegistry(object):
+    """
+    Drivers and teams kept in memory, looked up by id, ext_id, code or name.
+
+    Lookups other than by id are per type, e.g. all teams share the same code.
+    """
+
+    def __init__(self, competitors):
+        self._competitors = list(competitors)
+        self._by_id = {item.id: item for item in self._competitors}
+        self._by_ext_id = {(item.type, item.ext_id): item for item in self._competitors}
+        self._by_code = {(item.type, item.code): item for item in self._competitors}
+        self._by_name = {(item.type, item.name): item for item in self._competitors}
+
+    def all(self, type, active=False):
+        """Competitors of type, only active (of current season) if `active`."""
+        return [
+            item
+            for item in self._competitors
+            if item.type == type and (item.active or not active)
+        ]
+
+    def codes(self, type, active=True):
+        return [item.code for item in self.all(type, active)]
+
+    def names(self, type, active=True):
+        return [item.name for item in self.all(type, active)]
+
+    def by_id(self, id):
+        return self._by_id.get(id)
+
+    def by_ext_id(self, type, ext_id):
+        return self._by_ext_id.get((type, ext_id))
+
+    def by_code(self, type, code):
+        return self._by_code.get((type, code))
+
+    def by_name(self, type, name):
+        return self._by_name.get((type, name))
+
+
+def load_competitors():
+    stmt = db.select(
+        Competitor.id,
+        Competitor.ext_id,
+        Competitor.code,
+        Competitor.name,
+        Competitor.type,
+        Competitor.active,
+    ).order_by(Competitor.id)
+    return CompetitorRegistry(
+        CompetitorEntry(*row) for row in db.session.execute(stmt)
+    )
+
+
+COMPETITORS = VersionedCache("competitors", load_competitors)
+
+
+def get_competitors():
+    return COMPETITORS.get()
@@ -0,0 +1,193 @@
+"""
+asyncio client of the Ergast/Jolpica API for bulk fetching, e.g. backfill
+of a whole season in one event loop:
+
+    async with AsyncClient() as client:
+        results = await client.get_season_results(range(1, 25))
+
+Methods are the same as of Client, returning parsed JSON instead of
+futures, paginated collections are returned as lists of rows. Requests
+share the process rate limiter with Client, at most `concurrency` of
+them are in flight. Responses are not cached on disk.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from urllib.parse import urlencode
+
+import httpx
+
+from .client import (
+    API,
+    API_URL,
+    FIXTURES_DIR,
+    FIXTURES_MODE,
+    RATE_LIMITER,
+    REQUESTS_MAX_WORKERS,
+    YEAR,
+    retry_after,
+)
+from .fixtures import REPLAY, FixtureStore
+from .metrics import ERGAST_LATENCY, ERGAST_RETRIES
+
+LOG = logging.getLogger(__name__)
+
+# same as retry policy of Client: 3 attempts, delay 1s doubled up to 2 minutes
+MAX_ATTEMPTS = 3
+RETRY_SLEEP = 1.0
+RETRY_MAX_SLEEP = 120.0
+TIMEOUT = 30.0
+
+
+class AsyncClient(object):
+    def __init__(
+        self,
+        url=None,
+        rate_limiter=None,
+        concurrency=REQUESTS_MAX_WORKERS,
+        fixtures_dir=None,
+        fixtures_mode=None,
+        year=None,
+    ):
+        self._url = os.path.join(url or API_URL, API)
+        self._year = year or YEAR
+        self._rate_limiter = rate_limiter or RATE_LIMITER
+        self._semaphore = asyncio.Semaphore(concurrency)
+        fixtures_dir = fixtures_dir or FIXTURES_DIR
+        self._fixtures = FixtureStore(fixtures_dir) if fixtures_dir else None
+        self._fixtures_mode = fixtures_mode or FIXTURES_MODE
+        limits = httpx.Limits(
+            max_connections=concurrency, max_keepalive_connections=concurrency
+        )
+        self._http = httpx.AsyncClient(limits=limits, timeout=TIMEOUT)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        await self._http.aclose()
+
+    async def _get(self, endpoint, limit=None, offset=None):
+        url = os.path.join(self._url, endpoint)
+        params = {}
+        if limit:
+            params["limit"] = limit
+        if offset:
+            params["offset"] = offset
+        if params:
+            url = f"{url}?{urlencode(params)}"
+        if self._fixtures and self._fixtures_mode == REPLAY:
+            # no network, no rate limit
+            return self._fixtures.response(url).json()
+
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            try:
+                return await self._request(url)
+            except httpx.HTTPError as err:
+                if attempt == MAX_ATTEMPTS:
+                    raise
+                delay = min(RETRY_SLEEP * 2 ** (attempt - 1), RETRY_MAX_SLEEP)
+                LOG.debug("Retrying %s in %s seconds: %s", url, delay, err)
+                ERGAST_RETRIES.inc()
+                await asyncio.sleep(delay)
+
+    async def _request(self, url):
+        async with self._semaphore:
+            # due to ergast API limitations requests are rate limited
+            wait = self._rate_limiter.reserve()
+            if wait > 0:
+                LOG.debug("Rate limit reached, waiting %.2f seconds", wait)
+                await asyncio.sleep(wait)
+            start = time.perf_counter()
+            response = await self._http.get(url)
+            ERGAST_LATENCY.labels(response.status_code).observe(
+                time.perf_counter() - start
+            )
+
+        if response.status_code == 429:
+            # raised error below is retried, postpone all requests
+            seconds = retry_after(response, self._rate_limiter.interval)
+            LOG.warning("Too many requests, retrying after %s seconds", seconds)
+            self._rate_limiter.block(seconds)
+        response.raise_for_status()
+        return response.json()
+
+    async def get_current_schedule(self):
+        return await self._get(f"{self._year}.json")
+
+    async def get_result(self, round, rank=None):
+        return await self._get(
+            f"{self._year}/{round}/results{f'/{rank}' if rank else ''}.json"
+        )
+
+    async def get_q_result(self, round, rank=None):
+        return await self._get(
+            f"{self._year}/{round}/qualifying{f'/{rank}' if rank else ''}.json"
+        )
+
+    async def get_sprint_result(self, round, rank=None):
+        return await self._get(
+            f"{self._year}/{round}/sprint{f'/{rank}' if rank else ''}.json"
+        )
+
+    async def get_fastest_lap(self, round, rank=1):
+        return await self._get(f"{self._year}/{round}/fastest/{rank}/results.json")
+
+    async def get_constructors(self):
+        return await self._get(f"{self._year}/constructors/")
+
+    async def get_drivers(self):
+        return await self._get(f"{self._year}/drivers/")
+
+    async def get_driver_standings(self):
+        return await self._get(f"{self._year}/driverstandings/")
+
+    async def get_constructor_standings(self):
+        return await self._get(f"{self._year}/constructorstandings/")
+
+    async def paginate(self, endpoint, rows, limit=None):
+        """List of rows of all pages of collection, as Client.paginate."""
+        first = (await self._get(endpoint, limit))["MRData"]
+        limit, offset = max(int(first["limit"]), 1), int(first["offset"])
+        offsets = range(offset + limit, int(first["total"]), limit)
+        pages = await asyncio.gather(
+            *(self._get(endpoint, limit, page_offset) for page_offset in offsets)
+        )
+        return rows(first) + [row for page in pages for row in rows(page["MRData"])]
+
+    async def get_all_drivers(self, limit=None):
+        return await self.paginate(
+            f"{self._year}/drivers/", lambda data: data["DriverTable"]["Drivers"], limit
+        )
+
+    async def get_all_constructors(self, limit=None):
+        return await self.paginate(
+            f"{self._year}/constructors/",
+            lambda data: data["ConstructorTable"]["Constructors"],
+            limit,
+        )
+
+    async def get_round_results(self, round, is_sprint=False):
+        """All sessions of round: {"quali", "fastest_lap", "race"[, "sprint"]}."""
+        requests = {
+            "quali": self.get_q_result(round),
+            "fastest_lap": self.get_fastest_lap(round),
+            "race": self.get_result(round),
+        }
+        if is_sprint:
+            requests["sprint"] = self.get_sprint_result(round)
+        data = await asyncio.gather(*requests.values())
+        return dict(zip(requests, data))
+
+    async def get_season_results(self, rounds, sprint_rounds=()):
+        """{round: get_round_results(round)}, all rounds fetched concurrently."""
+        rounds = list(rounds)
+        data = await asyncio.gather(
+            *(self.get_round_results(round, round in sprint_rounds) for round in rounds)
+        )
+        return dict(zip(rounds, data))
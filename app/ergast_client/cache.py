@@ -0,0 +1,144 @@
+import json
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime, UTC
+
+import requests
+
+LOG = logging.getLogger(__name__)
+
+# results of a session don't change once final
+FINAL = "FINAL"
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# published results are provisional until penalties are settled after the race
+FINAL_AFTER = 3 * DAY
+PROVISIONAL_TTL = 10 * 60
+
+# (regex matched against URL, TTL in seconds), first match wins
+DEFAULT_TTLS = (
+    (r"/\d{4}/\d+/(results|qualifying|sprint|fastest)\b", FINAL),
+    (r"/\d{4}/(driverstandings|constructorstandings)\b", 10 * 60),
+    (r"/\d{4}/(drivers|constructors)\b", DAY),
+    (r"/\d{4}\.json$", DAY),  # schedule
+    (r".*", HOUR),
+)
+
+CachedResponse = namedtuple(
+    "CachedResponse", ["url", "body", "etag", "last_modified", "expires_at"]
+)
+
+
+class ResponseCache(object):
+    """
+    On-disk cache of API responses stored in SQLite file, keyed by URL.
+
+    Fresh responses are served without any request. Expired ones are
+    revalidated with ETag/Last-Modified when the server sent them.
+    """
+
+    def __init__(self, path, ttls=DEFAULT_TTLS, clock=time.time):
+        self._ttls = [(re.compile(pattern), ttl) for pattern, ttl in ttls]
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS response ("
+                "url TEXT PRIMARY KEY, body BLOB, etag TEXT, last_modified TEXT, "
+                "expires_at REAL)"
+            )
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def get(self, url):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT url, body, etag, last_modified, expires_at "
+                "FROM response WHERE url = ?",
+                (url,),
+            ).fetchone()
+        return CachedResponse(*row) if row else None
+
+    def is_fresh(self, cached):
+        return cached.expires_at is None or cached.expires_at > self._clock()
+
+    def put(self, url, response):
+        ttl = self._ttl(url, response.content)
+        if not ttl:
+            return
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO response VALUES (?, ?, ?, ?, ?)",
+                (
+                    url,
+                    response.content,
+                    response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"),
+                    self._expires_at(ttl),
+                ),
+            )
+
+    def refresh(self, cached):
+        """Prolong cached response revalidated by server (HTTP 304)."""
+        ttl = self._ttl(cached.url, cached.body)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE response SET expires_at = ? WHERE url = ?",
+                (self._expires_at(ttl), cached.url),
+            )
+
+    def _expires_at(self, ttl):
+        return None if ttl is FINAL else self._clock() + ttl
+
+    def _ttl(self, url, body):
+        ttl = next(ttl for pattern, ttl in self._ttls if pattern.search(url))
+        if ttl is FINAL:
+            try:
+                races = json.loads(body)["MRData"]["RaceTable"]["Races"]
+            except (ValueError, KeyError):
+                return 0
+            # session without results yet is not cached at all
+            if not races:
+                return 0
+            race_start = _race_timestamp(races[0])
+            if race_start and self._clock() > race_start + FINAL_AFTER:
+                return FINAL
+            return PROVISIONAL_TTL
+        return ttl
+
+
+def _race_timestamp(race):
+    """Start of race as UNIX timestamp, None if unknown."""
+    try:
+        time = race.get("time", "")[:-1] or "00:00:00"
+        start = datetime.fromisoformat(race["date"] + "T" + time)
+    except (KeyError, ValueError):
+        return None
+    return start.replace(tzinfo=UTC).timestamp()
+
+
+def validators(cached):
+    headers = {}
+    if cached.etag:
+        headers["If-None-Match"] = cached.etag
+    if cached.last_modified:
+        headers["If-Modified-Since"] = cached.last_modified
+    return headers
+
+
+def to_response(cached):
+    response = requests.Response()
+    response.status_code = 200
+    response.url = cached.url
+    response._content = cached.body
+    response.headers["Content-Type"] = "application/json"
+    return response
@@ -1,37 +1,124 @@
+import atexit
 import logging
 import os
 import threading
+import time
+from datetime import datetime, UTC
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlencode
 
 import requests
-from more_executors import Executors
-from time import sleep
+from flask import current_app
+from more_executors import ExceptionRetryPolicy, Executors
+from requests.adapters import HTTPAdapter
+
+from . import cache
+from .fixtures import RECORD, REPLAY, FixtureStore
+from .metrics import ERGAST_LATENCY, ERGAST_RETRIES
+from .ratelimit import RateLimiter
 
 LOG = logging.getLogger(__name__)
 
+API_URL = os.getenv("F1_ERGAST_URL", "https://api.jolpi.ca/")
 API = "ergast/f1"
+# season requested by default, the app passes its season by ERGAST_YEAR config
 YEAR = 2026
 
 REQUESTS_MAX_WORKERS = int(os.getenv("F1_ERGAST_REQUESTS_MAX_WORKERS", "4"))
-SLEEP_SECONDS = 2
+# jolpica limits: burst 4 requests per second, sustained 500 requests per hour
+REQUESTS_BURST = int(os.getenv("F1_ERGAST_REQUESTS_BURST", "4"))
+REQUESTS_PER_HOUR = float(os.getenv("F1_ERGAST_REQUESTS_PER_HOUR", "500"))
+
+# path to SQLite file with cached responses, cache is not used if not set
+CACHE_PATH = os.getenv("F1_ERGAST_CACHE", "")
+# directory with recorded responses, F1_ERGAST_FIXTURES_MODE is "record" or "replay"
+FIXTURES_DIR = os.getenv("F1_ERGAST_FIXTURES", "")
+FIXTURES_MODE = os.getenv("F1_ERGAST_FIXTURES_MODE", REPLAY)
+
+# shared by all clients and their worker threads in the process
+RATE_LIMITER = RateLimiter(REQUESTS_BURST, REQUESTS_PER_HOUR / 3600)
+_APP_CLIENT_LOCK = threading.Lock()
+
+
+def retry_after(response, default):
+    """Seconds to wait by Retry-After header of response, `default` without it."""
+    # Retry-After is either number of seconds or HTTP date
+    value = response.headers.get("Retry-After", "")
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return (parsedate_to_datetime(value) - datetime.now(UTC)).total_seconds()
+    except (TypeError, ValueError):
+        return default
+
+
+class RetryPolicy(ExceptionRetryPolicy):
+    def should_retry(self, attempt, future):
+        retry = super().should_retry(attempt, future)
+        if retry:
+            ERGAST_RETRIES.inc()
+        return retry
 
 
 class Client(object):
-    def __init__(self, url):
-        self._url = os.path.join(url, API)
+    def __init__(
+        self,
+        url=None,
+        rate_limiter=None,
+        response_cache=None,
+        fixtures_dir=None,
+        fixtures_mode=None,
+        year=None,
+    ):
+        self._url = os.path.join(url or API_URL, API)
+        self._year = year or YEAR
+        self._rate_limiter = rate_limiter or RATE_LIMITER
+        self._cache = response_cache
+        self._own_cache = self._cache is None and bool(CACHE_PATH)
+        if self._own_cache:
+            self._cache = cache.ResponseCache(CACHE_PATH)
+        fixtures_dir = fixtures_dir or FIXTURES_DIR
+        self._fixtures = FixtureStore(fixtures_dir) if fixtures_dir else None
+        self._fixtures_mode = fixtures_mode or FIXTURES_MODE
+        # one connection pool for all worker threads, its connections are kept
+        # alive and reused, at most one per worker thread
+        self._adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=REQUESTS_MAX_WORKERS, pool_block=True
+        )
         self._tls = threading.local()
+        self._closed = False
         self._executor = (
             Executors.thread_pool(max_workers=REQUESTS_MAX_WORKERS)
             .with_map(self._unpack_response)
-            .with_retry()
+            # missing fixture in replay mode is not worth retrying
+            .with_retry(RetryPolicy(exception_base=requests.RequestException))
         )
 
     def __enter__(self):
         return self
 
     def __exit__(self, *args, **kwargs):
-        self._executor.__exit__(*args, **kwargs)
+        self.close()
+
+    def close(self):
+        """Wait for submitted requests, then close connections and cache."""
+        if self._closed:
+            return
+        self._closed = True
+        self._executor.shutdown(wait=True)
+        self._adapter.close()
+        if self._own_cache:
+            self._cache.close()
 
     def _unpack_response(self, response):
+        if response.status_code == 429:
+            # raised error below is retried by executor, postpone all requests
+            retry_after = self._retry_after(response)
+            LOG.warning("Too many requests, retrying after %s seconds", retry_after)
+            self._rate_limiter.block(retry_after)
+
         try:
             out = response.json()
         except Exception:
@@ -43,38 +130,71 @@ class Client(object):
 
     @property
     def _session(self):
-        if not hasattr(self._tls, "session"):
-            self._tls.session = requests.Session()
-        return self._tls.session
+        # requests.Session is not thread-safe, each worker thread has its own
+        # one mounting the shared pool
+        session = getattr(self._tls, "session", None)
+        if session is None:
+            session = self._tls.session = requests.Session()
+            session.mount("https://", self._adapter)
+            session.mount("http://", self._adapter)
+        return session
+
+    def _retry_after(self, response):
+        return retry_after(response, self._rate_limiter.interval)
 
     def _do_request(self, **kwargs):
-        # due to ergast API limitations we need to wait between requests in order not to exceed limits
-        LOG.debug("Waiting %s seconds before making request", SLEEP_SECONDS)
-        sleep(SLEEP_SECONDS)
-        return self._session.request(**kwargs)
+        if self._fixtures and self._fixtures_mode == REPLAY:
+            # no network, no rate limit
+            return self._fixtures.response(kwargs["url"])
+
+        cached = None
+        if self._cache and kwargs["method"] == "GET":
+            cached = self._cache.get(kwargs["url"])
+            if cached and self._cache.is_fresh(cached):
+                LOG.debug("Using cached response for %s", kwargs["url"])
+                return cache.to_response(cached)
+            if cached:
+                kwargs["headers"] = cache.validators(cached)
+
+        # due to ergast API limitations requests are rate limited in order not to exceed limits
+        self._rate_limiter.acquire()
+        start = time.perf_counter()
+        response = self._session.request(**kwargs)
+        ERGAST_LATENCY.labels(response.status_code).observe(time.perf_counter() - start)
+
+        if cached and response.status_code == 304:
+            LOG.debug("Cached response for %s not modified", kwargs["url"])
+            self._cache.refresh(cached)
+            return cache.to_response(cached)
+        if self._cache and kwargs["method"] == "GET" and response.status_code == 200:
+            self._cache.put(kwargs["url"], response)
+        if self._fixtures and self._fixtures_mode == RECORD and response.status_code == 200:
+            self._fixtures.save(kwargs["url"], response.content)
+        return response
 
     def get_current_schedule(self):
         # https://ergast.com/api/f1/{YEAR}.json
-        endpoint = f"{YEAR}"
+        endpoint = f"{self._year}"
         url = os.path.join(self._url, endpoint + ".json")
         LOG.debug("Getting all races for season %s", endpoint)
         return self._executor.submit(self._do_request, method="GET", url=url)
 
-    def get_result(self, round, rank):
-        endpoint = f"{YEAR}/{round}/results/{rank}.json"
+    def get_result(self, round, rank=None):
+        # without rank whole classification is returned
+        endpoint = f"{self._year}/{round}/results{f'/{rank}' if rank else ''}.json"
         url = os.path.join(self._url, endpoint)
         LOG.debug("Getting result for race, round %s: %s", round, endpoint)
 
         return self._executor.submit(self._do_request, method="GET", url=url)
 
-    def get_q_result(self, round, rank):
-        endpoint = f"{YEAR}/{round}/qualifying/{rank}.json"
+    def get_q_result(self, round, rank=None):
+        endpoint = f"{self._year}/{round}/qualifying{f'/{rank}' if rank else ''}.json"
         url = os.path.join(self._url, endpoint)
         LOG.debug("Getting result for Q, rank: %s, round %s: %s", round, rank, endpoint)
         return self._executor.submit(self._do_request, method="GET", url=url)
 
-    def get_sprint_result(self, round, rank):
-        endpoint = f"{YEAR}/{round}/sprint/{rank}.json"
+    def get_sprint_result(self, round, rank=None):
+        endpoint = f"{self._year}/{round}/sprint{f'/{rank}' if rank else ''}.json"
         url = os.path.join(self._url, endpoint)
         LOG.debug(
             "Getting result for sprint, rank: %s, round %s: %s", round, rank, endpoint
@@ -82,8 +202,8 @@ class Client(object):
 
         return self._executor.submit(self._do_request, method="GET", url=url)
 
-    def get_fastest_lap(self, round, rank):
-        endpoint = f"{YEAR}/{round}/fastest/{rank}/results.json"
+    def get_fastest_lap(self, round, rank=1):
+        endpoint = f"{self._year}/{round}/fastest/{rank}/results.json"
         url = os.path.join(self._url, endpoint)
         LOG.debug(
             "Getting result of fastest lap, rank: %s, round %s: %s",
@@ -94,22 +214,109 @@ class Client(object):
 
         return self._executor.submit(self._do_request, method="GET", url=url)
 
+    def paginate(self, endpoint, rows, limit=None):
+        """
+        Yield rows of all pages of collection at `endpoint`.
+
+        `rows` returns rows of one page from its MRData. The first page
+        tells `total`, the remaining pages are then requested at once and
+        run concurrently in executor. Without `limit` pages are of the
+        default size of the API.
+        """
+        url = os.path.join(self._url, endpoint)
+        first = self._get_page(url, limit, 0).result()["MRData"]
+        limit, offset = max(int(first["limit"]), 1), int(first["offset"])
+        offsets = range(offset + limit, int(first["total"]), limit)
+        pages = [self._get_page(url, limit, page_offset) for page_offset in offsets]
+        LOG.debug("Getting %s in %s pages", endpoint, len(pages) + 1)
+        yield from rows(first)
+        for page in pages:
+            yield from rows(page.result()["MRData"])
+
+    def _get_page(self, url, limit, offset):
+        params = {}
+        if limit:
+            params["limit"] = limit
+        if offset:
+            params["offset"] = offset
+        query = urlencode(params)
+        return self._executor.submit(
+            self._do_request, method="GET", url=f"{url}?{query}" if query else url
+        )
+
+    def iter_drivers(self, limit=None):
+        return self.paginate(
+            f"{self._year}/drivers/", lambda data: data["DriverTable"]["Drivers"], limit
+        )
+
+    def iter_constructors(self, limit=None):
+        return self.paginate(
+            f"{self._year}/constructors/",
+            lambda data: data["ConstructorTable"]["Constructors"],
+            limit,
+        )
+
+    def iter_driver_standings(self, limit=None):
+        return self.paginate(
+            f"{self._year}/driverstandings/",
+            lambda data: _standings(data, "DriverStandings"),
+            limit,
+        )
+
+    def iter_constructor_standings(self, limit=None):
+        return self.paginate(
+            f"{self._year}/constructorstandings/",
+            lambda data: _standings(data, "ConstructorStandings"),
+            limit,
+        )
+
     def get_constructors(self):
-        endpoint = f"{YEAR}/constructors/"
+        endpoint = f"{self._year}/constructors/"
         url = os.path.join(self._url, endpoint)
         return self._executor.submit(self._do_request, method="GET", url=url)
 
     def get_drivers(self):
-        endpoint = f"{YEAR}/drivers/"
+        endpoint = f"{self._year}/drivers/"
         url = os.path.join(self._url, endpoint)
         return self._executor.submit(self._do_request, method="GET", url=url)
 
     def get_driver_standings(self):
-        endpoint = f"{YEAR}/driverstandings/"
+        endpoint = f"{self._year}/driverstandings/"
         url = os.path.join(self._url, endpoint)
         return self._executor.submit(self._do_request, method="GET", url=url)
 
     def get_constructor_standings(self):
-        endpoint = f"{YEAR}/constructorstandings/"
+        endpoint = f"{self._year}/constructorstandings/"
         url = os.path.join(self._url, endpoint)
         return self._executor.submit(self._do_request, method="GET", url=url)
+
+
+def _standings(data, key):
+    lists = data["StandingsTable"]["StandingsLists"]
+    return [row for standings in lists for row in standings[key]]
+
+
+def get_ergast_client():
+    """
+    Client shared by the whole process of current app.
+
+    It's created on first use, never before gunicorn forks workers, and
+    closed when the worker exits (see gunicorn.conf.py) or at interpreter
+    exit. Don't use it in `with` block, that would close it.
+    """
+    extensions = current_app.extensions
+    with _APP_CLIENT_LOCK:
+        client = extensions.get("ergast_client")
+        if client is None:
+            client = Client(year=current_app.config.get("ERGAST_YEAR"))
+            extensions["ergast_client"] = client
+            atexit.register(client.close)
+    return client
+
+
+def close_ergast_client(flask_app):
+    client = flask_app.extensions.pop("ergast_client", None)
+    if client is not None:
+        client.close()
+        atexit.unregister(client.close)
+
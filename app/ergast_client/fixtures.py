@@ -0,0 +1,59 @@
+import json
+import logging
+import os
+import re
+from urllib.parse import urlsplit
+
+import requests
+
+LOG = logging.getLogger(__name__)
+
+RECORD = "record"
+REPLAY = "replay"
+
+
+class FixtureNotFound(LookupError):
+    pass
+
+
+class FixtureStore(object):
+    """
+    API responses stored as JSON files in a directory.
+
+    File path mirrors URL path, e.g. https://api.jolpi.ca/ergast/f1/2026/1/results.json
+    is stored as <directory>/ergast/f1/2026/1/results.json.
+    """
+
+    def __init__(self, directory):
+        self._directory = directory
+
+    def path(self, url):
+        parts = urlsplit(url)
+        path = parts.path.strip("/")
+        if path.endswith(".json"):
+            path = path[: -len(".json")]
+        if parts.query:
+            path += "__" + re.sub(r"[^\w=]+", "_", parts.query)
+        return os.path.join(self._directory, path + ".json")
+
+    def load(self, url):
+        try:
+            with open(self.path(url), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            raise FixtureNotFound(f"No recorded response for {url}") from None
+
+    def save(self, url, body):
+        path = self.path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(json.loads(body), f, indent=2)
+        LOG.debug("Recorded response for %s to %s", url, path)
+
+    def response(self, url):
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = self.load(url)
+        response.headers["Content-Type"] = "application/json"
+        return response
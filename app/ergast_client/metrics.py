@@ -0,0 +1,14 @@
+"""
+Prometheus metrics of the client, registered in the default registry of
+prometheus_client, so they are exposed by whatever serves it (/metrics of
+the app).
+"""
+
+from prometheus_client import Counter, Histogram
+
+ERGAST_LATENCY = Histogram(
+    "f1_ergast_request_duration_seconds",
+    "Ergast API request latency, without waiting for rate limit",
+    ["status"],
+)
+ERGAST_RETRIES = Counter("f1_ergast_retries_total", "Retried Ergast API requests")
@@ -0,0 +1,52 @@
+import logging
+import threading
+import time
+
+LOG = logging.getLogger(__name__)
+
+
+class RateLimiter(object):
+    """
+    Thread-safe token bucket.
+
+    Up to `burst` requests are allowed at once, then tokens are refilled
+    with `rate` tokens per second.
+    """
+
+    def __init__(self, burst, rate, clock=time.monotonic, sleep=time.sleep):
+        self._burst = burst
+        self._rate = rate
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._blocked_until = 0.0
+
+    def reserve(self):
+        """Take one token and return number of seconds to wait before using it."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(
+                self._burst, self._tokens + (now - self._updated) * self._rate
+            )
+            self._updated = now
+            # tokens may go negative, it's a queue of requests waiting for refill
+            self._tokens -= 1
+            wait = -self._tokens / self._rate if self._tokens < 0 else 0.0
+            return max(wait, self._blocked_until - now)
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            LOG.debug("Rate limit reached, waiting %.2f seconds", wait)
+            self._sleep(wait)
+
+    def block(self, seconds):
+        """Don't allow any request for given number of seconds, e.g. on HTTP 429."""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, self._clock() + seconds)
+
+    @property
+    def interval(self):
+        return 1 / self._rate
@@ -0,0 +1,87 @@
+"""
+Local stand-in for the Ergast/Jolpica API serving recorded fixtures.
+
+    python -m app.ergast_client.stub_server tests/data/ergast --port 8000
+    export F1_ERGAST_URL=http://127.0.0.1:8000/
+"""
+
+import argparse
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .fixtures import FixtureNotFound, FixtureStore
+
+LOG = logging.getLogger(__name__)
+
+
+class StubServer(object):
+    def __init__(self, fixtures_dir, host="127.0.0.1", port=0):
+        store = FixtureStore(fixtures_dir)
+        # client address of every connection, keep-alive clients reuse them
+        self.connections = set()
+        connections = self.connections
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                connections.add(self.client_address)
+                try:
+                    body = store.load(self.path)
+                except FixtureNotFound as err:
+                    self.send_error(404, str(err))
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                LOG.debug(format, *args)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("fixtures_dir")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG)
+    server = StubServer(args.fixtures_dir, args.host, args.port)
+    print(f"Serving {args.fixtures_dir} at {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
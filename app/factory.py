@@ -22,9 +22,20 @@ def create_app(db_uri=None):
     else:
         flask_app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///test.sqlite3"
 
+    # season of ergast_client requests
+    flask_app.config["ERGAST_YEAR"] = app.models.CURRENT_SEASON
+
     db.init_app(flask_app)
     migrate.init_app(flask_app, db)
 
+    from .instrumentation import init_instrumentation
+
+    init_instrumentation(flask_app)
+
+    from .metrics import init_metrics
+
+    init_metrics(flask_app)
+
     login_manager = LoginManager()
     login_manager.login_view = "auth.login"
     login_manager.init_app(flask_app)
@@ -49,6 +60,29 @@ def create_app(db_uri=None):
 
     flask_app.register_blueprint(main_blueprint)
 
+    from .standings import rebuild_standings_command
+
+    flask_app.cli.add_command(rebuild_standings_command)
+
+    from .jobs import run_jobs_command, start_worker_thread
+
+    flask_app.cli.add_command(run_jobs_command)
+
+    from .ingest import schedule_results_command
+
+    flask_app.cli.add_command(schedule_results_command)
+
+    from .backfill import backfill_command
+
+    flask_app.cli.add_command(backfill_command)
+    # jobs are run by `flask run-jobs` in another process
+    flask_app.config["JOBS_EXTERNAL_WORKER"] = bool(
+        os.getenv("JOBS_EXTERNAL_WORKER", "")
+    )
+    if os.getenv("JOBS_THREAD", ""):
+        # worker in app process, for deployments without `flask run-jobs`
+        start_worker_thread(flask_app)
+
     return flask_app
 
 
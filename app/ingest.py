@@ -0,0 +1,167 @@
+"""
+Automatic loading of session results.
+
+For every session of the season (qualifying, sprint, race) a job is
+queued to run shortly after the session ends. Until the result is
+published the job is retried with exponential backoff, then the result
+is stored and the race is scored. Jobs are queued by periodic job every
+SCHEDULE_INTERVAL, so changes of schedule are picked up too. Manual
+values (safety car, driver of the day, bonus) are still entered by admin
+on /result/<circuit>.
+"""
+
+import logging
+from datetime import timedelta
+
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select, update
+
+from app import db
+from app.models import Race, RaceResult
+from .jobs import QUEUED, Retry, enqueue, task, utcnow
+from .results import get_session_result
+from .scoring import score_race
+from .utils import _db_exec, current_races
+
+LOG = logging.getLogger(__name__)
+
+# session: (start date attribute of race, expected duration)
+SESSIONS = {
+    "QUALI": ("quali_date", timedelta(hours=1)),
+    "SPRINT": ("sprint_date", timedelta(hours=1)),
+    "RACE": ("race_date", timedelta(hours=2)),
+}
+# result key of get_session_result: (type, rank) of RaceResult
+RESULT_KEYS = {
+    "quali": ("QUALI", None),
+    "sprint": ("SPRINT", None),
+    "first": ("RACE", 1),
+    "second": ("RACE", 2),
+    "third": ("RACE", 3),
+    "fastest_lap": ("FASTEST", None),
+}
+# first poll after expected end of session, results are rarely out sooner
+FIRST_POLL = timedelta(minutes=30)
+# sessions ended longer ago are not scheduled any more
+WINDOW = timedelta(days=3)
+SCHEDULE_INTERVAL = timedelta(hours=1)
+
+
+def session_end(race, session):
+    attr, duration = SESSIONS[session]
+    start = getattr(race, attr)
+    # dates are UTC, aware only when just parsed from API
+    return start.replace(tzinfo=None) + duration if start else None
+
+
+def _job_key(race, session):
+    return f"ingest_results:{race.ext_id}:{session}"
+
+
+def _loaded_sessions(race_ids):
+    # result type is named as the session
+    stmt = select(RaceResult.race_id, RaceResult.type).where(
+        RaceResult.race_id.in_(race_ids),
+        RaceResult.type.in_(SESSIONS),
+        RaceResult.value.is_not(None),
+    )
+    return set(_db_exec(stmt).all())
+
+
+def schedule_result_ingestion(now=None):
+    """
+    Queue ingestion job for every session without result that has not
+    ended more than WINDOW ago. Caller commits.
+
+    Already queued jobs are kept, only postponed when the session moved
+    later. Returns number of sessions with job queued.
+    """
+    now = now or utcnow()
+    races = _db_exec(current_races()).scalars().all()
+    loaded = _loaded_sessions([race.id for race in races])
+    count = 0
+    for race in races:
+        for session in SESSIONS:
+            end = session_end(race, session)
+            if end is None or end < now - WINDOW or (race.id, session) in loaded:
+                continue
+            run_at = end + FIRST_POLL
+            job = enqueue(
+                "ingest_results",
+                key=_job_key(race, session),
+                delay=max(run_at - now, timedelta()),
+                external_circuit_id=race.ext_id,
+                session=session,
+            )
+            if job.status == QUEUED and job.run_at < run_at:
+                job.run_at = run_at
+            count += 1
+    return count
+
+
+def store_session_result(race, result):
+    """Store result of get_session_result for race. Caller commits."""
+    for key, value in result.items():
+        type, rank = RESULT_KEYS[key]
+        stmt = (
+            update(RaceResult)
+            .where(
+                RaceResult.race_id == race.id,
+                RaceResult.type == type,
+                RaceResult.rank == rank,
+            )
+            .values(value=value)
+            .returning(RaceResult.id)
+        )
+        if not _db_exec(stmt).scalar():
+            db.session.add(
+                RaceResult(type=type, rank=rank, value=value, race_id=race.id)
+            )
+
+
+@task("ingest_results")
+def ingest_results(external_circuit_id, session):
+    stmt = current_races().where(Race.ext_id == external_circuit_id)
+    race = _db_exec(stmt).scalar()
+    if race is None:
+        # removed from the schedule since the job was queued
+        return {"status": "no race", "race": external_circuit_id, "session": session}
+    end = session_end(race, session)
+    if end is None:
+        return {"status": "no session", "race": race.ext_id, "session": session}
+    if utcnow() < end:
+        # session moved later since the job was queued
+        raise Retry("session not finished", delay=end + FIRST_POLL - utcnow())
+
+    result = get_session_result(race.round, session)
+    if result is None:
+        raise Retry(f"{session} result for round {race.round} not published")
+
+    store_session_result(race, result)
+    db.session.commit()
+    report = score_race(race)
+    LOG.info("%s result of %s loaded", session, race.ext_id)
+    return {
+        "status": "results saved",
+        "race": race.ext_id,
+        "session": session,
+        "result": result,
+        "scored_rows": report.rows,
+    }
+
+
+@task("schedule_results", every=SCHEDULE_INTERVAL)
+def schedule_results_task():
+    count = schedule_result_ingestion()
+    db.session.commit()
+    return {"status": "sessions scheduled", "sessions": count}
+
+
+@click.command("schedule-results")
+@with_appcontext
+def schedule_results_command():
+    """Queue automatic loading of session results."""
+    count = schedule_result_ingestion()
+    db.session.commit()
+    click.echo(f"{count} sessions scheduled")
@@ -0,0 +1,99 @@
+"""
+Per-request timing, enabled by F1_INSTRUMENTATION=1.
+
+Every request gets Server-Timing header with total time, time and number
+of SQL statements and template rendering time, and the same is logged as
+one JSON line by `app.instrumentation` logger.
+"""
+
+import json
+import logging
+import os
+import time
+from dataclasses import asdict, dataclass
+
+from flask import before_render_template, g, has_app_context, request, template_rendered
+
+LOG = logging.getLogger(__name__)
+
+ENV_VAR = "F1_INSTRUMENTATION"
+
+
+@dataclass
+class RequestTiming:
+    total: float = 0.0  # seconds
+    sql_count: int = 0
+    sql_time: float = 0.0
+    template_time: float = 0.0
+
+    def server_timing(self):
+        return ", ".join(
+            [
+                f"app;dur={self.total * 1000:.1f}",
+                f'db;dur={self.sql_time * 1000:.1f};desc="{self.sql_count} queries"',
+                f"tpl;dur={self.template_time * 1000:.1f}",
+            ]
+        )
+
+
+def is_enabled():
+    return os.getenv(ENV_VAR, "") not in ("", "0")
+
+
+def _current_timing():
+    # statements outside of request (CLI commands, scripts) are not recorded
+    if has_app_context():
+        return g.get("_timing")
+    return None
+
+
+def record_sql(elapsed):
+    """Count SQL statement into timing of current request, see app.metrics."""
+    timing = _current_timing()
+    if timing:
+        timing.sql_count += 1
+        timing.sql_time += elapsed
+
+
+def _before_render_template(sender, template, context, **extra):
+    g._template_start = time.perf_counter()
+
+
+def _template_rendered(sender, template, context, **extra):
+    timing = _current_timing()
+    if timing and "_template_start" in g:
+        timing.template_time += time.perf_counter() - g.pop("_template_start")
+
+
+def init_instrumentation(flask_app):
+    if not is_enabled():
+        return
+
+    # SQL statements are timed by engine hooks of app.metrics
+    before_render_template.connect(_before_render_template, flask_app)
+    template_rendered.connect(_template_rendered, flask_app)
+
+    @flask_app.before_request
+    def start_timing():
+        g._timing = RequestTiming()
+        g._request_start = time.perf_counter()
+
+    @flask_app.after_request
+    def finish_timing(response):
+        timing = g.pop("_timing", None)
+        if timing is None:
+            return response
+        timing.total = time.perf_counter() - g.pop("_request_start")
+        response.headers.add("Server-Timing", timing.server_timing())
+        LOG.info(
+            json.dumps(
+                {
+                    "method": request.method,
+                    "path": request.path,
+                    "endpoint": request.endpoint,
+                    "status": response.status_code,
+                    **asdict(timing),
+                }
+            )
+        )
+        return response
@@ -0,0 +1,285 @@
+"""
+Persistent job queue for work too slow for a request (API calls, scoring).
+
+Routes enqueue jobs to the `job` table and return right away, jobs are run
+by worker: a thread in every gunicorn worker (see gunicorn.conf.py) or app
+process when JOBS_THREAD is set, or `flask run-jobs` in separate process
+with JOBS_EXTERNAL_WORKER set for the app. Jobs are claimed by conditional
+UPDATE, so any number of workers may run against one DB.
+"""
+
+import logging
+import os
+import threading
+from datetime import datetime, timedelta, UTC
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import select, update
+
+from app import db
+from app.models import Job
+
+LOG = logging.getLogger(__name__)
+
+QUEUED = "QUEUED"
+RUNNING = "RUNNING"
+DONE = "DONE"
+FAILED = "FAILED"
+
+POLL_SECONDS = float(os.getenv("JOBS_POLL_SECONDS", "2"))
+# backoff of retried jobs: first delay, doubled with every attempt up to max
+RETRY_DELAY = timedelta(minutes=5)
+RETRY_MAX_DELAY = timedelta(hours=3)
+RETRY_MAX_ATTEMPTS = 12
+# job running longer is considered abandoned by its worker (killed, crashed)
+# and is queued again, tasks are safe to run again
+LEASE = timedelta(seconds=float(os.getenv("JOBS_LEASE_SECONDS", "1800")))
+
+# name: function called with job args, returns JSON serializable result
+TASKS = {}
+# name: interval of tasks run periodically by workers, without args
+PERIODIC = {}
+
+
+def task(name, every=None):
+    def register(func):
+        TASKS[name] = func
+        if every is not None:
+            PERIODIC[name] = every
+        return func
+
+    return register
+
+
+class Retry(Exception):
+    """
+    Raised by task to run its job again later.
+
+    Without `delay` the job is delayed by exponential backoff on its
+    attempts, it fails once it was tried RETRY_MAX_ATTEMPTS times.
+    """
+
+    def __init__(self, message="", delay=None):
+        super().__init__(message)
+        self.delay = delay
+
+
+def backoff(attempts):
+    return min(RETRY_DELAY * 2 ** max(attempts - 1, 0), RETRY_MAX_DELAY)
+
+
+def utcnow():
+    return datetime.now(UTC).replace(tzinfo=None)
+
+
+def enqueue(name, key=None, delay=None, **args):
+    """
+    Add job running task `name` with `args`. Caller commits.
+
+    If job with the same `key` is already queued or running, it is
+    returned instead of adding a new one.
+    """
+    if name not in TASKS:
+        raise KeyError(f"Unknown task {name}")
+    if key is not None:
+        stmt = select(Job).where(Job.key == key, Job.status.in_((QUEUED, RUNNING)))
+        job = db.session.execute(stmt).scalars().first()
+        if job:
+            return job
+
+    now = utcnow()
+    job = Job(
+        name=name,
+        args=args,
+        key=key,
+        status=QUEUED,
+        run_at=now + (delay or timedelta()),
+        attempts=0,
+        created_at=now,
+    )
+    db.session.add(job)
+    db.session.flush()
+    return job
+
+
+def schedule_periodic():
+    """Queue periodic tasks not queued yet, keyed by their name."""
+    for name in PERIODIC:
+        enqueue(name, key=name)
+    db.session.commit()
+
+
+def requeue_stale(now=None):
+    """
+    Queue again jobs running longer than LEASE, fail those already tried
+    RETRY_MAX_ATTEMPTS times. Return number of requeued and failed jobs.
+    """
+    now = now or utcnow()
+    stale = (Job.status == RUNNING, Job.started_at < now - LEASE)
+    stmt = (
+        update(Job)
+        .where(*stale, Job.attempts >= RETRY_MAX_ATTEMPTS)
+        .values(
+            status=FAILED,
+            finished_at=now,
+            error=f"Gave up after {RETRY_MAX_ATTEMPTS} attempts: worker lost",
+        )
+        .execution_options(synchronize_session=False)
+    )
+    failed = db.session.execute(stmt).rowcount
+    stmt = (
+        update(Job)
+        .where(*stale)
+        .values(status=QUEUED, run_at=now, error="Worker lost, queued again")
+        .execution_options(synchronize_session=False)
+    )
+    requeued = db.session.execute(stmt).rowcount
+    db.session.commit()
+    if failed or requeued:
+        LOG.warning("Stale jobs: %s queued again, %s failed", requeued, failed)
+    return requeued + failed
+
+
+def claim_next():
+    """Mark the first due job as running and return it, None if there is none."""
+    requeue_stale()
+    while True:
+        stmt = (
+            select(Job.id)
+            .where(Job.status == QUEUED, Job.run_at <= utcnow())
+            .order_by(Job.run_at, Job.id)
+            .limit(1)
+        )
+        job_id = db.session.execute(stmt).scalar()
+        if job_id is None:
+            return None
+
+        # another worker may have claimed it in the meantime
+        stmt = (
+            update(Job)
+            .where(Job.id == job_id, Job.status == QUEUED)
+            .values(status=RUNNING, started_at=utcnow(), attempts=Job.attempts + 1)
+            .execution_options(synchronize_session=False)
+        )
+        claimed = db.session.execute(stmt).rowcount
+        db.session.commit()
+        if claimed:
+            return db.session.get(Job, job_id)
+
+
+def run_job(job):
+    try:
+        result = TASKS[job.name](**job.args)
+    except Retry as retry:
+        db.session.rollback()
+        if retry.delay is None and job.attempts >= RETRY_MAX_ATTEMPTS:
+            job.status = FAILED
+            job.error = f"Gave up after {job.attempts} attempts: {retry}"
+        else:
+            job.status = QUEUED
+            delay = backoff(job.attempts) if retry.delay is None else retry.delay
+            job.run_at = utcnow() + delay
+            job.error = str(retry)
+    except Exception as err:
+        LOG.exception("Job %s (%s) failed", job.id, job.name)
+        db.session.rollback()
+        job.status = FAILED
+        job.error = repr(err)
+    else:
+        job.status = DONE
+        job.result = result
+    if job.status != QUEUED:
+        job.finished_at = utcnow()
+    db.session.commit()
+    LOG.info("Job %s (%s): %s", job.id, job.name, job.status)
+    if job.status != QUEUED and job.name in PERIODIC:
+        # finished job doesn't block its key any more
+        enqueue(job.name, key=job.name, delay=PERIODIC[job.name])
+        db.session.commit()
+    return job
+
+
+def run_pending():
+    """Run all due jobs, return number of jobs run."""
+    count = 0
+    while job := claim_next():
+        run_job(job)
+        count += 1
+    return count
+
+
+def work(flask_app, stop=None, poll=POLL_SECONDS):
+    stop = stop or threading.Event()
+    with flask_app.app_context():
+        try:
+            schedule_periodic()
+        except Exception:
+            LOG.exception("Periodic jobs not scheduled")
+        finally:
+            db.session.remove()
+    while not stop.is_set():
+        with flask_app.app_context():
+            try:
+                count = run_pending()
+            except Exception:
+                LOG.exception("Job worker failed")
+                count = 0
+            finally:
+                db.session.remove()
+        if not count:
+            stop.wait(poll)
+
+
+def start_worker_thread(flask_app):
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=work, args=(flask_app, stop), name="job-worker", daemon=True
+    )
+    thread.start()
+    flask_app.extensions["jobs_worker"] = (thread, stop)
+    return thread, stop
+
+
+def stop_worker_thread(flask_app, timeout=None):
+    """Stop job thread, wait up to `timeout` seconds until its job finishes."""
+    worker = flask_app.extensions.pop("jobs_worker", None)
+    if worker:
+        thread, stop = worker
+        stop.set()
+        thread.join(timeout)
+
+
+def has_worker(flask_app):
+    """Whether queued jobs are run: by thread of this process or `flask run-jobs`."""
+    return "jobs_worker" in flask_app.extensions or bool(
+        flask_app.config.get("JOBS_EXTERNAL_WORKER")
+    )
+
+
+def job_status(job):
+    return {
+        "id": job.id,
+        "name": job.name,
+        "status": job.status,
+        "attempts": job.attempts,
+        "created_at": job.created_at.isoformat(),
+        "started_at": job.started_at and job.started_at.isoformat(),
+        "finished_at": job.finished_at and job.finished_at.isoformat(),
+        "result": job.result,
+        "error": job.error,
+    }
+
+
+@click.command("run-jobs")
+@click.option("--once", is_flag=True, help="Run due jobs and exit.")
+@with_appcontext
+def run_jobs_command(once):
+    """Run queued jobs."""
+    if once:
+        schedule_periodic()
+        click.echo(f"{run_pending()} jobs run")
+        return
+    click.echo("Waiting for jobs")
+    work(current_app._get_current_object())
@@ -1,15 +1,36 @@
 import enum
+import hmac
 import os
 from collections import OrderedDict, defaultdict
-from time import sleep
 from datetime import timedelta
-from flask import Blueprint, flash, redirect, render_template, request, url_for
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    flash,
+    redirect,
+    render_template,
+    request,
+    url_for,
+)
 from flask_login import current_user, login_required
+from prometheus_client import CONTENT_TYPE_LATEST
 from sqlalchemy import update, select, func
-import pycountry
 from app import db
-from app.models import Bet, Competitor, Race, RaceResult, User
-from app.ergast_client.client import Client
+from app.models import (
+    BET_UNIQUE_KEY,
+    Bet,
+    Competitor,
+    Job,
+    Race,
+    RaceResult,
+    User,
+    resolve_country_code,
+)
+from app.ergast_client.client import get_ergast_client
+from .competitors import COMPETITORS, get_competitors
+from .jobs import enqueue, has_worker, job_status, task
+from .metrics import generate_metrics
 from .results import (
     evaluate_result_for_user,
     get_constructors_standings,
@@ -21,7 +42,11 @@ from .results import (
     eval_bet,
     SUNDAY_TYPES,
 )
+from .scoring import score_race, score_season, score_season_changes
+from .standings import get_standings
 from .utils import (
+    BET_LOCK_MAP,
+    current_races,
     date_or_none,
     get_current_race,
     get_label_attr_season,
@@ -29,6 +54,7 @@ from .utils import (
     is_bet_locked,
     get_competitors_codes,
     get_competitors_names,
+    upsert,
     _db_exec,
 )
 
@@ -78,6 +104,20 @@ def health():
     return {"status": "OK"}
 
 
+@main.route("/metrics")
+def metrics():
+    # scraped with METRICS_TOKEN as bearer token, or viewed by admin
+    token = os.getenv("METRICS_TOKEN", "")
+    authorization = request.headers.get("Authorization", "")
+    scraper = token and hmac.compare_digest(
+        authorization.encode(), f"Bearer {token}".encode()
+    )
+    admin = current_user.is_authenticated and current_user.role == "ADMIN"
+    if not (scraper or admin):
+        return Response("Unauthorized", 401, {"WWW-Authenticate": "Bearer"})
+    return Response(generate_metrics(), mimetype=CONTENT_TYPE_LATEST)
+
+
 @main.route("/")
 def index():
     return render_template("index.html")
@@ -103,7 +143,7 @@ def race(external_circuit_id):
     ##TODO create default bets foa all users/races
     drivers_codes = get_competitors_codes(type="DRIVER")
 
-    stmt = db.select(Race).where(Race.ext_id == external_circuit_id)
+    stmt = current_races().where(Race.ext_id == external_circuit_id)
     res = _db_exec(stmt)
     race = res.scalar()  # first?
 
@@ -140,24 +180,13 @@ def race(external_circuit_id):
             }
             bet_data.append(bet)
 
-        if user_bet:
-            for item in bet_data:
-                stmt = (
-                    update(Bet)
-                    .where(
-                        Bet.user_id == current_user.id,
-                        Bet.race_id == race.id,
-                        Bet.type == item["type"],
-                        Bet.rank == item["rank"],
-                    )
-                    .values(extra=item["extra"], value=item["value"], rank=item["rank"])
-                    .returning(Bet)
-                )
-                if not _db_exec(stmt).scalar():
-                    db.session.add(Bet.from_data(item))
-
-        else:  # store whole bet even with empty bets
-            db.session.add_all(Bet.from_data(bet_data))
+        if bet_data:
+            upsert(
+                Bet,
+                [Bet.values_from_data(item) for item in bet_data],
+                index_elements=BET_UNIQUE_KEY,
+                update_columns=("value", "extra"),
+            )
 
         db.session.commit()
         flash(MESSAGES["BET_SAVED"])
@@ -168,7 +197,7 @@ def race(external_circuit_id):
         "bet": user_bet,
         "locks": locks,
         "race": race,
-        "country_code": get_country_code(race.country),
+        "country_code": get_country_code(race),
         "start_times": {
             "q_start": date_or_none(race.quali_date),
             "s_start": date_or_none(race.sprint_date) if race.sprint_date else None,
@@ -184,18 +213,9 @@ def race(external_circuit_id):
     return render_template("race.html", data=response)
 
 
-def get_country_code(country):
-    out = ""
-    if len(country) == 2:
-        out = country
-    else:
-        _country = pycountry.countries.get(name=country) or pycountry.countries.get(
-            alpha_3=country
-        )
-        if _country:
-            out = _country.alpha_2.lower()
-
-    return out
+def get_country_code(race):
+    # races created before country_code column was added
+    return race.country_code or resolve_country_code(race.country)
 
 
 def get_joker_stats_for_uses(user_id):
@@ -225,7 +245,7 @@ def races():
             "external_circuit_id": race.ext_id,
         }
 
-    stmt = db.select(Race)
+    stmt = current_races()
     races = _db_exec(stmt).scalars().all()
     currrent_race = get_current_race()
     table_head = ["F1 2026", "SPRINT", "KVALIFIKACE", "ZÁVOD", ""]
@@ -283,23 +303,13 @@ def season():
             }
             bet_data.append(bet)
 
-        if user_bet:
-            for item in bet_data:
-                stmt = (
-                    update(Bet)
-                    .where(
-                        Bet.user_id == current_user.id,
-                        Bet.type == item["type"],
-                        Bet.rank == item["rank"],
-                    )
-                    .values(value=item["value"], rank=item["rank"])
-                    .returning(Bet)
-                )
-                if not _db_exec(stmt).scalar():
-                    db.session.add(Bet.from_data(item))
-
-        else:  # store whole bet even with empty bets
-            db.session.add_all(Bet.from_data(bet_data))
+        # season bets keep team match evaluation stored in extra
+        upsert(
+            Bet,
+            [Bet.values_from_data(item) for item in bet_data],
+            index_elements=BET_UNIQUE_KEY,
+            update_columns=("value",),
+        )
 
         db.session.commit()
         flash("Tip v pořádku uložen")
@@ -336,56 +346,69 @@ def bet_result_current():
 @main.route("/bet_result/<string:external_circuit_id>", methods=["GET"])
 @login_required
 def bet_result(external_circuit_id):
-    stmt = select(Race).where(Race.ext_id == external_circuit_id)
+    stmt = current_races().where(Race.ext_id == external_circuit_id)
 
     race = _db_exec(stmt).scalar()
     out_results = {"race_id": race.ext_id, "race_name": race.name, "results": []}
-    stmt = select(Competitor)
-    competitors = {item.id: item.code for item in _db_exec(stmt).scalars().all()}
+    competitors = get_competitors()
 
     for item in race.race_results:
-
+        competitor = competitors.by_id(item.competitor_id)
         to_add = {
             "type": f"{item.type}{"_" + str(item.rank) if item.rank is not None else ""}",
-            "val": competitors.get(item.competitor_id)
+            "val": (competitor and competitor.code)
             or item.value,  ###pridat  relationship do tabulky raceresult
         }
 
         out_results["results"].append(to_add)
 
-    stmt = select(User)
-    users = _db_exec(stmt).scalars().all()
+    # all users with their bets for the race (if any)
+    stmt = (
+        select(User.id, User.username, Bet)
+        .outerjoin(Bet, (Bet.user_id == User.id) & (Bet.race_id == race.id))
+        .order_by(User.id, Bet.id)
+    )
 
-    out_users = []
     locks = get_locks_race(race)
-    for user in users:
-        stmt = select(Bet).where(Bet.race_id == race.id, Bet.user_id == user.id)
-        res = _db_exec(stmt).scalars().all()
+    # bets of other users are hidden until the bet type is locked
+    hidden_types = {
+        bet_type for bet_type in BET_LOCK_MAP if not is_bet_locked(bet_type, locks)
+    }
 
-        item = {"username": user.username, "race": external_circuit_id, "bets": []}
-        total = 0
-        for bet in res:
-            if bet.value is None:
-                value = None
-            elif current_user.id == user.id:
-                value = bet.value
-            elif not is_bet_locked(bet.type, locks) and current_user.id != user.id:
-                value = "LOCKED"
-            else:
-                value = bet.value
+    users_map = {}
+    for user_id, username, bet in _db_exec(stmt):
+        item = users_map.setdefault(
+            user_id,
+            {
+                "username": username,
+                "race": external_circuit_id,
+                "bets": [],
+                "total_points": 0,
+            },
+        )
+        if bet is None:
+            continue
 
-            item["bets"].append(
-                {
-                    "type": f"{bet.type}{"_" + str(bet.rank) if bet.rank is not None else ""}",
-                    "points": bet.result,
-                    "value": value,
-                    "extra": bet.extra,
-                }
-            )
-            total += bet.result
+        if bet.value is None:
+            value = None
+        elif current_user.id == user_id:
+            value = bet.value
+        elif bet.type in hidden_types:
+            value = "LOCKED"
+        else:
+            value = bet.value
 
-        item["total_points"] = total
-        out_users.append(item)
+        item["bets"].append(
+            {
+                "type": f"{bet.type}{"_" + str(bet.rank) if bet.rank is not None else ""}",
+                "points": bet.result,
+                "value": value,
+                "extra": bet.extra,
+            }
+        )
+        item["total_points"] += bet.result
+
+    out_users = list(users_map.values())
 
     response = {
         "race": out_results,
@@ -635,7 +658,7 @@ def evaluate_result_post(external_circuit_id):
     if current_user.role != "ADMIN":
         raise Exception
 
-    stmt = select(Race).where(Race.ext_id == external_circuit_id)
+    stmt = current_races().where(Race.ext_id == external_circuit_id)
     race = _db_exec(stmt).scalar()
 
     stmt = select(RaceResult).where(
@@ -659,46 +682,14 @@ def evaluate_result_post(external_circuit_id):
         rows.append([user.username, bonus_guess, user.id])
 
     if request.method == "POST":
-        users = _db_exec(select(User)).scalars().all()
-
-        stmt = select(RaceResult).where(RaceResult.race_id == race.id)
-        race_result_map = {}
-
-        for r in _db_exec(stmt).scalars().all():
-            key = f"{r.type}_{r.rank}" if r.rank else r.type
-            race_result_map[key] = r
-
-        for user in users:
-            bonus_ok = True if request.form.get(str(user.id), "") == "on" else False
-            stmt = select(Bet).where(
-                Bet.race_id == race.id, Bet.type == "BONUS", Bet.user_id == user.id
-            )
-            bet = _db_exec(stmt).scalar()
-
-            if bet and bonus_ok:
-                bet.result = 2
-                if bet.extra and bet.extra == "JOKER":
-                    bet.result *= 2
-                db.session.commit()
-
-            for type_rank in KEY_TYPE_RANK_MAP.values():
-                type, rank = type_rank
-
-                if type == "BONUS":
-                    continue
-                # import pdb; pdb.set_trace()
-                if type == "SPRINT" and race.type != "SPRINT":
-                    continue
-                stmt = select(Bet).where(
-                    Bet.race_id == race.id,
-                    Bet.type == type,
-                    Bet.rank == rank,
-                    Bet.user_id == user.id,
-                )
-                bet = _db_exec(stmt).scalar()
-
-                bet.result = eval_bet(bet, race_result_map)
-                db.session.commit()
+        # checkbox per user, named by user id
+        bonus_ok_user_ids = {
+            int(key)
+            for key, value in request.form.items()
+            if key.isdigit() and value == "on"
+        }
+        report = score_race(race, bonus_ok_user_ids)
+        flash(f"SCORED {report.rows} BETS IN {report.elapsed:.3f}s")
 
     return render_template(
         "evaluate.html", race=race, thead=thead, rows=rows, bonus_table=bonus_table
@@ -711,9 +702,25 @@ def load_results(external_circuit_id):
     if current_user.role != "ADMIN":
         raise Exception
 
-    stmt = select(Race).where(Race.ext_id == external_circuit_id)
+    stmt = current_races().where(Race.ext_id == external_circuit_id)
     race = _db_exec(stmt).scalar()
 
+    if request.method == "POST":
+        # values not available from API are entered manually
+        manual = {key: request.form.get(key) for key in KEY_TYPE_RANK_MAP}
+        if not has_worker(current_app):
+            flash("NO JOB WORKER, RESULT NOT LOADED")
+            return redirect(url_for(".load_results", external_circuit_id=race.ext_id))
+        job = enqueue(
+            "load_results",
+            key=f"load_results:{race.ext_id}",
+            external_circuit_id=race.ext_id,
+            manual=manual,
+        )
+        db.session.commit()
+        flash(f"RESULT LOADING QUEUED, JOB {job.id}")
+        return redirect(url_for(".load_results", external_circuit_id=race.ext_id))
+
     stmt = select(RaceResult).where(RaceResult.race_id == race.id)
     results = _db_exec(stmt).scalars().all()
     loaded = False
@@ -723,52 +730,6 @@ def load_results(external_circuit_id):
     else:
         flash(f"RESULT FOR {external_circuit_id} NOT LOADED!")
 
-    if request.method == "POST":
-        ## do update
-        new_results = []
-        result_data = get_result_for_round(
-            race.round, True if race.sprint_date else False
-        )
-
-        for key in KEY_TYPE_RANK_MAP:
-            if key in result_data:
-                value = result_data[key]
-
-            else:
-                value = request.form.get(key)
-
-            item = {
-                "type": KEY_TYPE_RANK_MAP[key][0],
-                "rank": KEY_TYPE_RANK_MAP[key][
-                    1
-                ],  ### competitor ID nebo value prilezitostne
-                "value": value,
-                "race_id": race.id,
-            }
-            new_results.append(item)
-
-        if results:
-            for item in new_results:
-                if item["type"] == "SPRINT" and race.type != "SPRINT":
-                    continue
-                stmt = (
-                    update(RaceResult)
-                    .where(
-                        RaceResult.race_id == race.id,
-                        RaceResult.type == item["type"],
-                        RaceResult.rank == item["rank"],
-                    )
-                    .values(value=item["value"], rank=item["rank"])
-                    .returning(RaceResult)
-                )
-                if not _db_exec(stmt).scalar():
-                    db.session.add(RaceResult.from_data(item))
-
-        else:
-            db.session.add_all(RaceResult.from_data(new_results))
-        db.session.commit()
-        flash("RESULT SAVED TO DB")
-
     return render_template(
         "result.html",
         race=race,
@@ -777,6 +738,59 @@ def load_results(external_circuit_id):
     )
 
 
+@task("load_results")
+def load_results_task(external_circuit_id, manual):
+    stmt = current_races().where(Race.ext_id == external_circuit_id)
+    race = _db_exec(stmt).scalar()
+
+    stmt = select(RaceResult).where(RaceResult.race_id == race.id)
+    results = _db_exec(stmt).scalars().all()
+
+    new_results = []
+    result_data = get_result_for_round(
+        race.round, True if race.sprint_date else False
+    )
+
+    for key in KEY_TYPE_RANK_MAP:
+        if key in result_data:
+            value = result_data[key]
+
+        else:
+            value = manual.get(key)
+
+        item = {
+            "type": KEY_TYPE_RANK_MAP[key][0],
+            "rank": KEY_TYPE_RANK_MAP[key][
+                1
+            ],  ### competitor ID nebo value prilezitostne
+            "value": value,
+            "race_id": race.id,
+        }
+        new_results.append(item)
+
+    if results:
+        for item in new_results:
+            if item["type"] == "SPRINT" and race.type != "SPRINT":
+                continue
+            stmt = (
+                update(RaceResult)
+                .where(
+                    RaceResult.race_id == race.id,
+                    RaceResult.type == item["type"],
+                    RaceResult.rank == item["rank"],
+                )
+                .values(value=item["value"], rank=item["rank"])
+                .returning(RaceResult)
+            )
+            if not _db_exec(stmt).scalar():
+                db.session.add(RaceResult.from_data(item))
+
+    else:
+        db.session.add_all(RaceResult.from_data(new_results))
+    db.session.commit()
+    return {"status": "results saved", "race": race.ext_id}
+
+
 @main.route("/results/load/", methods=["GET"])
 @login_required
 def load_standings_route():
@@ -791,7 +805,7 @@ def load_standings_route():
 def results_table(message=None):
     if current_user.role != "ADMIN":
         raise Exception
-    races = db.session.query(Race).all()
+    races = _db_exec(current_races()).scalars().all()
 
     def get_row(race):
         return {
@@ -837,59 +851,6 @@ constr_ext_id_name_map = {
 }
 
 
-def compute_driver_season(user, standings):
-    stmt = select(Bet).where(Bet.user_id == user.id, Bet.type == "SEASON_DRIVER")
-    bets = _db_exec(stmt).scalars().all()
-    for bet in bets:
-        driver_code_bet = bet.value
-        if (pos := standings[driver_code_bet]["position"]) == bet.rank:
-            if pos == 1:
-                bet.result = 12
-            else:
-                bet.result = 2
-
-
-def compute_constr_result(user, standings):
-    stmt = select(Bet).where(Bet.user_id == user.id, Bet.type == "SEASON_TEAM")
-    bets = _db_exec(stmt).scalars().all()
-    for bet in bets:
-        constructor_ext_id_bet = constr_ext_id_name_map[bet.value]
-        if (pos := standings[constructor_ext_id_bet].position) == bet.rank:
-            if pos == 1:
-                bet.result = 7
-            else:
-                bet.result = 2
-
-
-def compute_team_match_result(user, standings):
-    stmt = select(Bet).where(Bet.user_id == user.id, Bet.type == "SEASON_DRIVER")
-    bets = _db_exec(stmt).scalars().all()
-    bets_map = {bet.value: bet for bet in bets}
-
-    for pair in TEAM_MATCH_DRIVERS_MAP.values():
-        print(pair)
-        sorted_pair = sorted(pair)
-        first_driver = sorted_pair[0]
-        second_driver = sorted_pair[1]
-        first_driver_stdgs = standings[first_driver]["position"]
-        second_driver_stdgs = standings[second_driver]["position"]
-        print("LIVE", first_driver_stdgs, second_driver_stdgs)
-
-        first_driver_bet = bets_map[first_driver].rank
-        second_driver_bet = bets_map[second_driver].rank
-        print("BET", first_driver_bet, second_driver_bet)
-        first_better_bet = first_driver_bet < second_driver_bet
-        first_better_stdgs = first_driver_stdgs < second_driver_stdgs
-        hit = first_better_bet is first_better_stdgs
-        print(f"HIT: {hit}")
-        if hit:
-            bets_map[first_driver].extra = "MATCH OK"
-            bets_map[second_driver].extra = "MATCH OK"
-        else:
-            bets_map[first_driver].extra = "MATCH NOT OK"
-            bets_map[second_driver].extra = "MATCH NOT OK"
-
-
 @main.route("/bet_overview")
 @login_required
 def bet_overview():
@@ -900,162 +861,112 @@ def bet_overview():
 @main.route("/top_players")
 @login_required
 def top_players():
-    # TODO 2025 (season)
-    """
-    {
-    [
-    "username": "XXX",
-    "points": 123,
-    "order": 1 - should be ordered ideally
-
-    ]
-    }
+    return render_template("current_top_players.html", data=get_standings())
 
-    """
-    # stmt = select(Bet).where(Bet.type != "SEASON_DRIVER" or Bet.type != "SEASON_TEAM")
-    stmt = select(Bet)
-    # improvement: do sum and group by user on db side
-    all_bets = _db_exec(stmt).scalars().all()
-
-    user_result_map_races = {}
-    user_result_map_season = {}
-    user_result_map_total = {}
-    for bet in all_bets:
-        user_result_map_races.setdefault(
-            bet.user.username,
-            {
-                "username": bet.user.username,
-                "points": 0,
-                "order": 0,
-            },
+
+# guess_overview/season/load
+@main.route("/guess_overview/season/load")
+@login_required
+def update_standings():
+    if current_user.role != "ADMIN":
+        raise Exception
+    if not has_worker(current_app):
+        return _no_worker()
+    job = enqueue("update_standings", key="update_standings")
+    db.session.commit()
+    return _job_queued(job)
+
+
+@task("update_standings")
+def update_standings_task():
+    # projected season points are rescored right away for changed positions
+    projection = bool(os.getenv("SEASON_PROJECTION", ""))
+    client = get_ergast_client()
+    driver_standings = get_drivers_standings(client)
+    constructor_standings = get_constructors_standings(client)
+    if projection:
+        positions_before = get_season_positions()
+    for driver_id, item in driver_standings.items():
+        stmt = (
+            update(Competitor)
+            .where(Competitor.ext_id == driver_id)
+            .values(points=item["points"], position=item["position"])
         )
-        user_result_map_season.setdefault(
-            bet.user.username,
-            {
-                "username": bet.user.username,
-                "points": 0,
-                "order": 0,
-            },
+        _db_exec(stmt)
+    for constructor_id, item in constructor_standings.items():
+        stmt = (
+            update(Competitor)
+            .where(Competitor.ext_id == constructor_id)
+            .values(points=item["points"], position=item["position"])
         )
-        user_result_map_total.setdefault(
-            bet.user.username,
-            {
-                "username": bet.user.username,
-                "points": 0,
-                "order": 0,
-            },
+        _db_exec(stmt)
+    COMPETITORS.invalidate()
+    if projection:
+        score_season_changes(
+            positions_before,
+            get_season_positions(),
+            TEAM_MATCH_DRIVERS_MAP.values(),
         )
-        if bet.type in ("SEASON_DRIVER", "SEASON_TEAM"):
-            user_result_map_season[bet.user.username]["points"] += bet.result
-            user_result_map_total[bet.user.username]["points"] += bet.result
-            if bet.extra == "MATCH OK":
-                user_result_map_season[bet.user.username]["points"] += 0.5
-                user_result_map_total[bet.user.username]["points"] += 0.5
-
-        else:
-            user_result_map_races[bet.user.username]["points"] += bet.result
-            user_result_map_total[bet.user.username]["points"] += bet.result
-
-    user_result_races = sorted(
-        user_result_map_races.values(), key=lambda item: item["points"], reverse=True
-    )
-    user_result_season = sorted(
-        user_result_map_season.values(), key=lambda item: item["points"], reverse=True
-    )
-    user_result_total = sorted(
-        user_result_map_total.values(), key=lambda item: item["points"], reverse=True
-    )
+    db.session.commit()
 
-    return render_template(
-        "current_top_players.html",
-        data={
-            "RACES": user_result_races,
-            "SEASON": user_result_season,
-            "TOTAL": user_result_total,
-        },
-    )
+    return {"status": "standings updated"}
 
-    sums_for_users = defaultdict(float)  # map user: points
-    for bet, user in bet_user:
-        race_result = race_result_map.get(bet.race_id) or None
-        if race_result and bet:
-            _, points = evaluate_result_for_user(race_result, bet)
-        else:
-            points = 0.0
-        sums_for_users[user.username] += points
-        total[user.username] += points
-
-    for username in sums_for_users:
-        current_points = sums_for_users[username]
-        out.append({"user": username, "points": current_points})
-        # poresit pak stejne pozice?
-    users = db.session.query(User).all()
-    season_results = compute_season_result(users)
-
-    season_out = []
-    for user in users:
-        points = season_results[user.username]["total"]
-        season_out.append({"points": points, "user": user.username})
-        total[user.username] += points
-    full_out = []
-
-    for username, points in total.items():
-        full_out.append({"points": points, "user": username})
-    # import pdb; pdb.set_trace()
-    data = {}
-    data["RACE"] = sorted(out, key=lambda d: d["points"], reverse=True)
-    data["SEASON"] = sorted(season_out, key=lambda d: d["points"], reverse=True)
-    data["FULL"] = sorted(full_out, key=lambda d: d["points"], reverse=True)
 
-    return render_template(
-        "current_top_players.html",
-        data=data,
+@main.route("/compute_season")
+@login_required
+def compute_season_route():
+    if current_user.role != "ADMIN":
+        raise Exception
+    if not has_worker(current_app):
+        return _no_worker()
+    job = enqueue("compute_season", key="compute_season")
+    db.session.commit()
+    return _job_queued(job)
+
+
+@task("compute_season")
+def compute_season_task():
+    driver_positions, team_positions = get_season_positions()
+    report = score_season(
+        driver_positions, team_positions, team_pairs=TEAM_MATCH_DRIVERS_MAP.values()
     )
+    return {"status": "season computed", "bets": report.bets, "rows": report.rows}
 
 
-# guess_overview/season/load
-@main.route("/guess_overview/season/load")
+@main.route("/jobs/<int:job_id>")
 @login_required
-def update_standings():
-    with Client("https://api.jolpi.ca/") as client:
-        driver_standings = get_drivers_standings(client)
-        sleep(5)
-        constructor_standings = get_constructors_standings(client)
-        for driver_id, item in driver_standings.items():
-            stmt = (
-                update(Competitor)
-                .where(Competitor.ext_id == driver_id)
-                .values(points=item["points"], position=item["position"])
-            )
-            _db_exec(stmt)
-        for constructor_id, item in constructor_standings.items():
-            stmt = (
-                update(Competitor)
-                .where(Competitor.ext_id == constructor_id)
-                .values(points=item["points"], position=item["position"])
-            )
-            _db_exec(stmt)
-        db.session.commit()
+def job_status_route(job_id):
+    if current_user.role != "ADMIN":
+        raise Exception
+    return job_status(db.get_or_404(Job, job_id))
 
-    return {"status": "standings updated"}
 
+def _no_worker():
+    # job would wait in queue forever
+    return {
+        "status": "error",
+        "message": "No job worker, set JOBS_THREAD or run flask run-jobs",
+    }, 503
 
-@main.route("/compute_season")
-@login_required
-def compute_season_route():
-    # import pdb; pdb.set_trace()
-    stmt = select(User)
-    users = _db_exec(stmt).scalars().all()
 
-    adjusted_drivers_standings = get_driver_adjusted_standings()
-    constructors_standings_map = get_constr_standings()
+def _job_queued(job):
+    return {
+        "status": "queued",
+        "job": job.id,
+        "url": url_for(".job_status_route", job_id=job.id),
+    }, 202
 
-    for user in users:
-        compute_driver_season(user, adjusted_drivers_standings)
-        compute_constr_result(user, constructors_standings_map)
-        compute_team_match_result(user, adjusted_drivers_standings)
-        db.session.commit()
-    return {"status": "season computed"}
+
+def get_season_positions():
+    """Return positions of drivers (by code) and teams (by name) as bet on."""
+    driver_positions = {
+        code: item["position"] for code, item in get_driver_adjusted_standings().items()
+    }
+    # team bets are on names offered by season form, i.e. names of competitors
+    team_positions = {
+        team.name: team.position for team in get_constr_standings().values()
+    }
+    return driver_positions, team_positions
 
 
 def get_driver_adjusted_standings():
@@ -0,0 +1,95 @@
+"""
+Prometheus metrics exposed on /metrics.
+
+With several gunicorn workers PROMETHEUS_MULTIPROC_DIR must point to
+a directory shared by the workers (set in gunicorn.conf.py), metrics of
+all workers are then aggregated from files in it.
+"""
+
+import os
+import time
+
+from flask import g, has_request_context, request
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+
+from app import db
+from app.instrumentation import record_sql
+
+REQUEST_LATENCY = Histogram(
+    "f1_request_duration_seconds",
+    "Request latency by route",
+    ["endpoint", "method", "status"],
+)
+DB_STATEMENTS = Counter(
+    "f1_db_statements_total",
+    "SQL statements issued, by route (none outside of requests)",
+    ["endpoint"],
+)
+DB_STATEMENT_LATENCY = Histogram(
+    "f1_db_statement_duration_seconds",
+    "SQL statement execution time",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+SCORING_DURATION = Histogram(
+    "f1_scoring_duration_seconds",
+    "Duration of scoring",
+    ["kind"],  # race | season
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+
+
+def _endpoint():
+    if has_request_context():
+        return request.endpoint or "none"
+    return "none"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("_sql_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # the only SQL timing hooks, also feed request timing of instrumentation
+    elapsed = time.perf_counter() - conn.info["_sql_start"].pop()
+    DB_STATEMENT_LATENCY.observe(elapsed)
+    DB_STATEMENTS.labels(_endpoint()).inc()
+    record_sql(elapsed)
+
+
+def init_metrics(flask_app):
+    with flask_app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    @flask_app.before_request
+    def start_request_metrics():
+        g._metrics_start = time.perf_counter()
+
+    @flask_app.after_request
+    def observe_request_metrics(response):
+        if "_metrics_start" in g:
+            REQUEST_LATENCY.labels(
+                _endpoint(), request.method, response.status_code
+            ).observe(time.perf_counter() - g.pop("_metrics_start"))
+        return response
+
+
+def get_registry():
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def generate_metrics():
+    return generate_latest(get_registry())
@@ -1,14 +1,18 @@
 from datetime import datetime
+from functools import lru_cache
 from typing import Optional
 
 from flask_login import UserMixin
-from sqlalchemy import ForeignKey
+from sqlalchemy import JSON, ForeignKey, Index, UniqueConstraint, func, literal_column
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app import db
 
 import pytz
 
+# season of the game, races of older seasons are imported history
+CURRENT_SEASON = 2026
+
 
 class User(UserMixin, db.Model):
     __tablename__ = "user"
@@ -20,6 +24,23 @@ class User(UserMixin, db.Model):
     email: Mapped[Optional[str]]
 
     bets: Mapped[list["Bet"]] = relationship(back_populates="user")
+    standing: Mapped[Optional["UserStanding"]] = relationship(back_populates="user")
+
+
+class UserStanding(db.Model):
+    """Points of user summed from scored bets, updated on every scoring."""
+
+    __tablename__ = "user_standing"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("user.id"), primary_key=True)
+    race_points: Mapped[float] = mapped_column(default=0.0)
+    season_points: Mapped[float] = mapped_column(default=0.0)  # incl. team match
+    total_points: Mapped[float] = mapped_column(default=0.0)
+    race_rank: Mapped[int] = mapped_column(default=0)
+    season_rank: Mapped[int] = mapped_column(default=0)
+    rank: Mapped[int] = mapped_column(default=0, index=True)  # by total points
+
+    user: Mapped["User"] = relationship(back_populates="standing")
 
 
 FIX_COUNTRY_MAP = {
@@ -28,15 +49,33 @@ FIX_COUNTRY_MAP = {
 }
 
 
+@lru_cache(maxsize=64)
+def resolve_country_code(country):
+    """Lowercase ISO alpha-2 code of country name, alpha-2 or alpha-3 code, or ""."""
+    if len(country) == 2:
+        return country.lower()
+
+    # imported lazily, loading of ISO database is slow
+    import pycountry
+
+    _country = pycountry.countries.get(name=country) or pycountry.countries.get(
+        alpha_3=country
+    )
+    return _country.alpha_2.lower() if _country else ""
+
+
 class Race(db.Model):
     __tablename__ = "race"
+    __table_args__ = (UniqueConstraint("season", "round", name="uq_race_season_round"),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     name: Mapped[str]
-    round: Mapped[int] = mapped_column(unique=True)
+    season: Mapped[int] = mapped_column(default=CURRENT_SEASON)
+    round: Mapped[int]
     country: Mapped[str]
+    country_code: Mapped[Optional[str]]  # alpha-2, lowercase
     circuit_name: Mapped[str]
-    ext_id: Mapped[str]
+    ext_id: Mapped[str] = mapped_column(index=True)
 
     sprint_date: Mapped[Optional[datetime]]
     quali_date: Mapped[datetime]
@@ -58,11 +97,19 @@ class Race(db.Model):
         if isinstance(data, list):
             return [cls.race_from_data(elem) for elem in data]
 
-        kwargs = {  ### tytto kwatgs pripravit jinde a poslat rovnout spravny dict jako kwagrtsf pro Race(**kw)
+        return cls(**cls.values_from_data(data))
+
+    @classmethod
+    def values_from_data(cls, data):
+        """Column values of one race of schedule."""
+        country = cls.fix_country(data["Circuit"]["Location"]["country"])
+        return {
             # basic data
             "name": data["raceName"],
+            "season": int(data["season"]),
             "round": int(data["round"]),
-            "country": cls.fix_country(data["Circuit"]["Location"]["country"]),
+            "country": country,
+            "country_code": resolve_country_code(country),
             "circuit_name": data["Circuit"]["circuitName"],
             "ext_id": data["Circuit"]["circuitId"],
             # dates
@@ -72,8 +119,6 @@ class Race(db.Model):
             "type": "SPRINT" if data.get("Sprint") else "NORMAL",
         }
 
-        return cls(**kwargs)
-
     @staticmethod
     def format_date(data):
         if data:
@@ -91,6 +136,9 @@ class Race(db.Model):
 
 class RaceResult(db.Model):  ### pkey vice hodnot
     __tablename__ = "raceresult"
+    __table_args__ = (
+        Index("ix_raceresult_race_id_type_rank", "race_id", "type", "rank"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
 
@@ -105,7 +153,11 @@ class RaceResult(db.Model):  ### pkey vice hodnot
         if isinstance(data, list):
             return [cls.from_data(elem) for elem in data]
 
-        kwargs = {
+        return cls(**cls.values_from_data(data))
+
+    @staticmethod
+    def values_from_data(data):
+        return {
             "type": data["type"].upper(),
             "rank": data["rank"],
             "competitor_id": data.get("competitor_id"),
@@ -113,10 +165,22 @@ class RaceResult(db.Model):  ### pkey vice hodnot
             "race_id": data["race_id"],
         }
 
-        return cls(**kwargs)
+
+# one result per race, type and rank, rank may be NULL
+RACE_RESULT_UNIQUE_KEY = (
+    RaceResult.race_id,
+    RaceResult.type,
+    func.coalesce(RaceResult.rank, literal_column("0")),
+)
+Index("uq_raceresult_race_id_type_rank", *RACE_RESULT_UNIQUE_KEY, unique=True)
 
 
 class Bet(db.Model):
+    __table_args__ = (
+        Index("ix_bet_race_id_user_id", "race_id", "user_id"),
+        Index("ix_bet_user_id_type_rank", "user_id", "type", "rank"),
+    )
+
     id: Mapped[int] = mapped_column(primary_key=True)
 
     type: Mapped[
@@ -141,7 +205,11 @@ class Bet(db.Model):
         if isinstance(data, list):
             return [cls.from_data(elem) for elem in data]
 
-        kwargs = {
+        return cls(**cls.values_from_data(data))
+
+    @staticmethod
+    def values_from_data(data):
+        return {
             "type": data["type"].upper(),
             "rank": data["rank"],
             "value": data["value"],
@@ -150,14 +218,26 @@ class Bet(db.Model):
             "user_id": data["user_id"],
         }
 
-        return cls(**kwargs)
-
     def __repr__(self):
         return f"RACE: {self.race_id}, USER:{self.user.username}, TYPE: {self.type}"
 
 
+# one bet per user, race, type and rank
+# race_id (season bets) and rank may be NULL and NULLs are distinct in unique index
+BET_UNIQUE_KEY = (
+    Bet.user_id,
+    func.coalesce(Bet.race_id, literal_column("0")),
+    Bet.type,
+    func.coalesce(Bet.rank, literal_column("0")),
+)
+Index("uq_bet_user_id_race_id_type_rank", *BET_UNIQUE_KEY, unique=True)
+
+
 class Competitor(db.Model):
     __tablename__ = "competitor"
+    __table_args__ = (
+        UniqueConstraint("type", "ext_id", name="uq_competitor_type_ext_id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     ext_id: Mapped[str]
@@ -176,20 +256,24 @@ class Competitor(db.Model):
         if isinstance(data, dict) and "MRData" in data:
             return cls.drivers_from_data(data["MRData"]["DriverTable"]["Drivers"])
 
-        if isinstance(data, list):
+        if not isinstance(data, dict):
+            # list or any other iterable, e.g. Client.iter_drivers()
             return [cls.drivers_from_data(elem) for elem in data]
 
-        kwargs = {  ### tytto kwatgs pripravit jinde a poslat rovnout spravny dict jako kwagrtsf pro Race(**kw)
+        return cls(**cls.driver_values_from_data(data))
+
+    @staticmethod
+    def driver_values_from_data(data):
+        return {
             # basic data
             "name": f"{data['givenName']} {data['familyName']}",
             "ext_id": data["driverId"],
-            "code": data["code"],
+            # drivers of old seasons have no code
+            "code": data.get("code") or data["familyName"][:3].upper(),
             "type": "DRIVER",
             "active": True,
         }
 
-        return cls(**kwargs)
-
     @classmethod
     def teams_from_data(cls, data):
         if isinstance(data, dict) and "MRData" in data:
@@ -197,10 +281,14 @@ class Competitor(db.Model):
                 data["MRData"]["ConstructorTable"]["Constructors"]
             )
 
-        if isinstance(data, list):
+        if not isinstance(data, dict):
             return [cls.teams_from_data(elem) for elem in data]
 
-        kwargs = {  ### tytto kwatgs pripravit jinde a poslat rovnout spravny dict jako kwagrtsf pro Race(**kw)
+        return cls(**cls.team_values_from_data(data))
+
+    @staticmethod
+    def team_values_from_data(data):
+        return {
             # basic data
             "name": data["name"],
             "ext_id": data["constructorId"],
@@ -209,4 +297,35 @@ class Competitor(db.Model):
             "active": True,
         }
 
-        return cls(**kwargs)
+
+class CacheVersion(db.Model):
+    """Version of data cached in app processes, bumped on every change of the data."""
+
+    __tablename__ = "cache_version"
+
+    name: Mapped[str] = mapped_column(primary_key=True)
+    version: Mapped[int] = mapped_column(default=0)
+
+
+class Job(db.Model):
+    """Task run by job worker outside of request, see app.jobs."""
+
+    __tablename__ = "job"
+    __table_args__ = (
+        Index("ix_job_status_run_at", "status", "run_at"),
+        Index("ix_job_key_status", "key", "status"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str]  # registered task
+    args: Mapped[dict] = mapped_column(JSON, default=dict)
+    # only one queued or running job with the same key
+    key: Mapped[Optional[str]]
+    status: Mapped[str]  # QUEUED | RUNNING | DONE | FAILED
+    run_at: Mapped[datetime]  # not started before
+    attempts: Mapped[int] = mapped_column(default=0)
+    created_at: Mapped[datetime]
+    started_at: Mapped[Optional[datetime]]
+    finished_at: Mapped[Optional[datetime]]
+    result: Mapped[Optional[dict]] = mapped_column(JSON)
+    error: Mapped[Optional[str]]
@@ -1,58 +1,41 @@
-from time import sleep
-from .ergast_client.client import Client
+from .ergast_client.client import get_ergast_client
 from app import db
 
 import requests
 
 API = "https://ergast.com/api/f1/2024/"
 SUNDAY_TYPES = ("RACE", "SC", "FASTEST", "BONUS", "DRIVERDAY")
+BONUS_POINTS = 2
 
 
-def get_result(client, round, rank):
-    data = client.get_result(round, rank).result()
-    return data["MRData"]["RaceTable"]["Races"][0]["Results"][0]["Driver"]["code"]
+def get_classification(data, key="Results"):
+    races = data["MRData"]["RaceTable"]["Races"]
+    return races[0][key] if races else []
 
 
-def get_q_result(client, round):
-    rank = 1
-    data = client.get_q_result(round, rank).result()
-    return data["MRData"]["RaceTable"]["Races"][0]["QualifyingResults"][0]["Driver"][
-        "code"
-    ]
-
-
-def get_sprint_result(client, round):
-    rank = 1
-    data = client.get_sprint_result(round, rank).result()
-    return data["MRData"]["RaceTable"]["Races"][0]["SprintResults"][0]["Driver"]["code"]
-
-
-def get_fastest_lap(client, round):
-    rank = 1
-    data = client.get_fastest_lap(round, rank).result()
-
-    return data["MRData"]["RaceTable"]["Races"][0]["Results"][0]["Driver"]["code"]
+def get_codes(data, key="Results", count=1):
+    return [item["Driver"]["code"] for item in get_classification(data, key)[:count]]
 
 
 def get_result_for_round(round, is_sprint=False):
-    with Client("https://api.jolpi.ca/") as client:
-        quali = get_q_result(client, round)
-        sleep(0.5)
-        sprint = None
-        if is_sprint:
-            sprint = get_sprint_result(client, round)
-        sleep(0.5)
-        fastest_lap = get_fastest_lap(client, round)
-        sleep(0.5)
-
-        podium = []
+    client = get_ergast_client()
+    # whole classification of each session in one call, all calls are
+    # submitted at once and run concurrently in client executor
+    futures = {
+        "quali": client.get_q_result(round),
+        "fastest_lap": client.get_fastest_lap(round),
+        "race": client.get_result(round),
+    }
+    if is_sprint:
+        futures["sprint"] = client.get_sprint_result(round)
+    data = {key: future.result() for key, future in futures.items()}
 
-        for rank in [1, 2, 3]:
-            podium.append(get_result(client, round, rank))
-            sleep(0.5)
+    [quali] = get_codes(data["quali"], "QualifyingResults")
+    [fastest_lap] = get_codes(data["fastest_lap"])
+    podium = get_codes(data["race"], count=3)
     out = {
         "quali": quali,
-        "sprint": sprint,
+        "sprint": None,
         "fastest_lap": fastest_lap,
         "first": podium[0],
         "second": podium[1],
@@ -62,9 +45,36 @@ def get_result_for_round(round, is_sprint=False):
 
     if is_sprint is False:
         del out["sprint"]
+    else:
+        [out["sprint"]] = get_codes(data["sprint"], "SprintResults")
     return out
 
 
+def get_session_result(round, session):
+    """
+    Result of one session ("QUALI", "SPRINT" or "RACE") keyed as in
+    get_result_for_round, None if it's not published yet.
+    """
+    client = get_ergast_client()
+    if session == "QUALI":
+        codes = get_codes(client.get_q_result(round).result(), "QualifyingResults")
+        return {"quali": codes[0]} if codes else None
+    if session == "SPRINT":
+        codes = get_codes(client.get_sprint_result(round).result(), "SprintResults")
+        return {"sprint": codes[0]} if codes else None
+    race, fastest_lap = client.get_result(round), client.get_fastest_lap(round)
+    podium = get_codes(race.result(), count=3)
+    fastest_lap = get_codes(fastest_lap.result())
+    if len(podium) < 3 or not fastest_lap:
+        return None
+    return {
+        "first": podium[0],
+        "second": podium[1],
+        "third": podium[2],
+        "fastest_lap": fastest_lap[0],
+    }
+
+
 def evaluate_result_for_user(result, guess):
     attrs = ("first", "second", "third")
     if result:
@@ -112,8 +122,7 @@ def evaluate_result_for_user(result, guess):
 
 
 def get_drivers_standings(client):
-    raw = client.get_driver_standings().result()
-    data = raw["MRData"]["StandingsTable"]["StandingsLists"][0]["DriverStandings"]
+    data = client.iter_driver_standings()
     return {
         item["Driver"]["driverId"]: {
             "points": item["points"],
@@ -124,8 +133,7 @@ def get_drivers_standings(client):
 
 
 def get_constructors_standings(client):
-    raw = client.get_constructor_standings().result()
-    data = raw["MRData"]["StandingsTable"]["StandingsLists"][0]["ConstructorStandings"]
+    data = client.iter_constructor_standings()
     return {
         item["Constructor"]["constructorId"]: {
             "points": item["points"],
@@ -285,3 +293,12 @@ def eval_bet(bet, results):
             bet_result *= 2
 
     return bet_result
+
+
+def eval_bonus_bet(bet):
+    # bonus answers are checked manually by admin, only accepted ones are scored
+    bet_result = BONUS_POINTS
+    if bet.extra and bet.extra == "JOKER":
+        bet_result *= 2
+
+    return bet_result
@@ -0,0 +1,272 @@
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+from sqlalchemy import bindparam, select, update
+
+from app import db
+from app.metrics import SCORING_DURATION
+from app.models import Bet, RaceResult
+from .results import eval_bet, eval_bonus_bet
+from .standings import (
+    SEASON_TYPES,
+    TEAM_MATCH_OK,
+    apply_standings_delta,
+    record_delta,
+)
+from .utils import _db_exec
+
+LOG = logging.getLogger(__name__)
+
+TEAM_MATCH_NOT_OK = "MATCH NOT OK"
+# evaluations of bets scored concurrently by others, see _score
+MAX_ATTEMPTS = 3
+# points for exact position: (champion, any other position)
+SEASON_POINTS = {
+    "SEASON_DRIVER": (12, 2),
+    "SEASON_TEAM": (7, 2),
+}
+
+
+class ScoringConflict(Exception):
+    """Bets were scored concurrently since they were read."""
+
+
+@dataclass
+class ScoringReport:
+    bets: int  # number of evaluated bets
+    rows: int  # number of bets with changed result written to DB
+    elapsed: float  # seconds
+
+
+def get_race_result_map(race_id):
+    stmt = select(RaceResult).where(RaceResult.race_id == race_id)
+    race_result_map = {}
+    for r in _db_exec(stmt).scalars().all():
+        key = f"{r.type}_{r.rank}" if r.rank else r.type
+        race_result_map[key] = r
+
+    return race_result_map
+
+
+def score_race(race, bonus_ok_user_ids=()):
+    """
+    Evaluate all bets for given race and store results.
+
+    Bets are loaded in one query and evaluated in memory, changed results
+    are written by one bulk UPDATE and committed in single transaction
+    together with updated user standings. Bets scored concurrently since
+    they were loaded (e.g. by job and admin) are evaluated again.
+    BONUS bets are scored only for users in `bonus_ok_user_ids`.
+    """
+    start = time.perf_counter()
+    race_result_map = get_race_result_map(race.id)
+
+    def evaluate():
+        bets = _race_bets(race.id)
+        changes = []
+        deltas = {user_id: [0.0, 0.0] for user_id in {bet.user_id for bet in bets}}
+        for bet in bets:
+            if bet.type == "BONUS":
+                if bet.user_id not in bonus_ok_user_ids:
+                    continue
+                result = eval_bonus_bet(bet)
+            elif bet.type == "SPRINT" and race.type != "SPRINT":
+                continue
+            else:
+                result = eval_bet(bet, race_result_map)
+
+            if result != bet.result:
+                changes.append(_change(bet, result, bet.extra))
+                record_delta(deltas, bet, result, bet.extra)
+        return bets, changes, deltas
+
+    bets, changes = _score(evaluate)
+
+    report = ScoringReport(
+        bets=len(bets), rows=len(changes), elapsed=time.perf_counter() - start
+    )
+    LOG.info(
+        "Race %s scored: %s bets, %s rows updated in %.3fs",
+        race.ext_id,
+        report.bets,
+        report.rows,
+        report.elapsed,
+    )
+    SCORING_DURATION.labels("race").observe(report.elapsed)
+    return report
+
+
+def score_season(driver_positions, team_positions, team_pairs):
+    """
+    Evaluate season bets of all users against current standings and store results.
+
+    `driver_positions` and `team_positions` map bet value (driver code,
+    team name) to position, `team_pairs` are pairs of driver codes of
+    one team for team match. Competitors missing in positions can't be hit.
+
+    All season bets are loaded in one query and evaluated in passes over
+    all users at once: exact positions over all bets, team match over
+    drivers x users table of bet ranks. Changed results are written by
+    one bulk UPDATE together with user standings, misses are reset to 0.
+    """
+    stmt = select(
+        Bet.id, Bet.user_id, Bet.type, Bet.rank, Bet.value, Bet.extra, Bet.result
+    ).where(Bet.type.in_(SEASON_TYPES))
+    return _score_season_bets(
+        stmt, driver_positions, team_positions, team_pairs, "Season scored"
+    )
+
+
+def score_season_changes(before, after, team_pairs):
+    """
+    Rescore only season bets affected by change of standings.
+
+    `before` and `after` are (driver positions, team positions) as passed
+    to score_season. Only bets on competitors whose position changed and
+    on their team mates (for team match) are loaded and evaluated.
+    """
+    changed_drivers = _changed(before[0], after[0])
+    changed_teams = _changed(before[1], after[1])
+    pairs = [pair for pair in team_pairs if changed_drivers & set(pair)]
+    drivers = changed_drivers.union(*pairs)
+
+    stmt = select(
+        Bet.id, Bet.user_id, Bet.type, Bet.rank, Bet.value, Bet.extra, Bet.result
+    ).where(
+        ((Bet.type == "SEASON_DRIVER") & Bet.value.in_(drivers))
+        | ((Bet.type == "SEASON_TEAM") & Bet.value.in_(changed_teams))
+    )
+    return _score_season_bets(
+        stmt, after[0], after[1], pairs, "Season projection updated"
+    )
+
+
+def _changed(before, after):
+    return {
+        key for key in before.keys() | after.keys() if before.get(key) != after.get(key)
+    }
+
+
+def _score_season_bets(stmt, driver_positions, team_positions, team_pairs, message):
+    start = time.perf_counter()
+
+    def evaluate():
+        bets = _db_exec(stmt).all()
+        results, extras = _evaluate_season_bets(
+            bets, driver_positions, team_positions, team_pairs
+        )
+        changes = []
+        deltas = {user_id: [0.0, 0.0] for user_id in {bet.user_id for bet in bets}}
+        for bet, result, extra in zip(bets, results, extras):
+            if result != bet.result or extra != bet.extra:
+                changes.append(_change(bet, result, extra))
+                record_delta(deltas, bet, result, extra)
+        return bets, changes, deltas
+
+    bets, changes = _score(evaluate)
+
+    report = ScoringReport(
+        bets=len(bets), rows=len(changes), elapsed=time.perf_counter() - start
+    )
+    LOG.info(
+        "%s: %s bets, %s rows updated in %.3fs",
+        message,
+        report.bets,
+        report.rows,
+        report.elapsed,
+    )
+    SCORING_DURATION.labels("season").observe(report.elapsed)
+    return report
+
+
+def _evaluate_season_bets(bets, driver_positions, team_positions, team_pairs):
+    """Return lists of new results and extras of `bets`."""
+    positions = {"SEASON_DRIVER": driver_positions, "SEASON_TEAM": team_positions}
+    results = []
+    for bet in bets:
+        champion, other = SEASON_POINTS[bet.type]
+        hit = bet.value is not None and positions[bet.type].get(bet.value) == bet.rank
+        results.append((champion if bet.rank == 1 else other) if hit else 0)
+
+    # driver code: {user_id: (bet rank, index of bet)}
+    driver_ranks = defaultdict(dict)
+    for index, bet in enumerate(bets):
+        if bet.type == "SEASON_DRIVER" and bet.value is not None:
+            driver_ranks[bet.value][bet.user_id] = (bet.rank, index)
+
+    extras = [bet.extra for bet in bets]
+    for pair in team_pairs:
+        first, second = sorted(pair)
+        if first not in driver_positions or second not in driver_positions:
+            continue
+        first_better = driver_positions[first] < driver_positions[second]
+        first_ranks, second_ranks = driver_ranks[first], driver_ranks[second]
+        for user_id in first_ranks.keys() & second_ranks.keys():
+            first_rank, first_index = first_ranks[user_id]
+            second_rank, second_index = second_ranks[user_id]
+            hit = (first_rank < second_rank) is first_better
+            extras[first_index] = extras[second_index] = (
+                TEAM_MATCH_OK if hit else TEAM_MATCH_NOT_OK
+            )
+
+    return results, extras
+
+
+def _race_bets(race_id):
+    stmt = select(
+        Bet.id, Bet.user_id, Bet.type, Bet.rank, Bet.value, Bet.extra, Bet.result
+    ).where(Bet.race_id == race_id)
+    return _db_exec(stmt).all()
+
+
+def _change(bet, result, extra):
+    # old values make the update conditional, see _db_exec_bulk_update
+    return {
+        "_id": bet.id,
+        "_old_result": bet.result,
+        "_old_extra": bet.extra,
+        "new_result": result,
+        "new_extra": extra,
+    }
+
+
+def _score(evaluate):
+    """
+    Store changes of bets by `evaluate` -> (bets, changes, deltas) and commit.
+
+    Changed results and standings are written in savepoint, rolled back if
+    any of the bets was scored concurrently since it was read, then the
+    bets are evaluated again. Return (bets, changes) as written.
+    """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        bets, changes, deltas = evaluate()
+        try:
+            with db.session.begin_nested():
+                if changes and _db_exec_bulk_update(changes).rowcount != len(changes):
+                    raise ScoringConflict(f"{len(changes)} bets changed concurrently")
+                apply_standings_delta(deltas)
+        except ScoringConflict:
+            if attempt == MAX_ATTEMPTS:
+                raise
+            LOG.info("Bets scored concurrently, evaluating again")
+            continue
+        db.session.commit()
+        return bets, changes
+
+
+def _db_exec_bulk_update(changes):
+    # single executemany statement, only bets still having the old result
+    # (not scored concurrently) are updated
+    table = Bet.__table__
+    stmt = (
+        update(table)
+        .where(
+            table.c.id == bindparam("_id"),
+            table.c.result == bindparam("_old_result"),
+            table.c.extra.is_not_distinct_from(bindparam("_old_extra")),
+        )
+        .values(result=bindparam("new_result"), extra=bindparam("new_extra"))
+    )
+    return db.session.execute(stmt, changes)
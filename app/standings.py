@@ -0,0 +1,251 @@
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import bindparam, case, delete, func, select, update
+
+from app import db
+from app.models import Bet, User, UserStanding
+from .utils import _db_exec, upsert
+
+SEASON_TYPES = ("SEASON_DRIVER", "SEASON_TEAM")
+TEAM_MATCH_OK = "MATCH OK"
+TEAM_MATCH_POINTS = 0.5
+
+RANKS = (
+    # rank column, points column
+    ("race_rank", "race_points"),
+    ("season_rank", "season_points"),
+    ("rank", "total_points"),
+)
+
+
+def bet_points(bet_type, result, extra):
+    """Return (race points, season points) of single bet."""
+    if bet_type in SEASON_TYPES:
+        team_match = TEAM_MATCH_POINTS if extra == TEAM_MATCH_OK else 0.0
+        return 0.0, result + team_match
+    return result, 0.0
+
+
+def record_delta(deltas, bet, result, extra):
+    """
+    Record change of points of `bet` (with old values) to new `result`
+    and `extra` into `deltas` map user_id: [race delta, season delta].
+    """
+    old_race, old_season = bet_points(bet.type, bet.result, bet.extra)
+    new_race, new_season = bet_points(bet.type, result, extra)
+    delta = deltas.setdefault(bet.user_id, [0.0, 0.0])
+    delta[0] += new_race - old_race
+    delta[1] += new_season - old_season
+
+
+def _points_stmt():
+    is_season = Bet.type.in_(SEASON_TYPES)
+    team_match = case((Bet.extra == TEAM_MATCH_OK, TEAM_MATCH_POINTS), else_=0.0)
+
+    race_points = func.sum(case((is_season, 0.0), else_=Bet.result))
+    season_points = func.sum(case((is_season, Bet.result + team_match), else_=0.0))
+
+    return (
+        select(
+            User.id.label("user_id"),
+            User.username,
+            race_points.label("race_points"),
+            season_points.label("season_points"),
+            (race_points + season_points).label("total_points"),
+        )
+        .join(Bet.user)
+        .group_by(User.id, User.username)
+    )
+
+
+def _leaderboard_stmt():
+    points = _points_stmt().subquery()
+
+    def rank(column):
+        return func.row_number().over(order_by=(column.desc(), points.c.username))
+
+    return select(
+        points,
+        rank(points.c.race_points).label("race_rank"),
+        rank(points.c.season_points).label("season_rank"),
+        rank(points.c.total_points).label("total_rank"),
+    )
+
+
+def _leaderboard_from_rows(rows):
+    out = {key: [None] * len(rows) for key in ("RACES", "SEASON", "TOTAL")}
+    for row in rows:
+        for key, points, order in (
+            ("RACES", row.race_points, row.race_rank),
+            ("SEASON", row.season_points, row.season_rank),
+            ("TOTAL", row.total_points, row.total_rank),
+        ):
+            out[key][order - 1] = {
+                "username": row.username,
+                "points": points,
+                "order": order,
+            }
+
+    return out
+
+
+def get_leaderboard():
+    """
+    Return race, season and total standings of users computed from bets.
+
+    Points are summed and ranked by DB in one GROUP BY query, each list
+    is ordered by its rank:
+
+    {
+        "RACES": [{"username": "XXX", "points": 123, "order": 1}, ...],
+        "SEASON": [...],
+        "TOTAL": [...],
+    }
+    """
+    return _leaderboard_from_rows(_db_exec(_leaderboard_stmt()).all())
+
+
+def get_standings():
+    """Same as get_leaderboard, but read from precomputed user standings."""
+    stmt = (
+        select(
+            User.username,
+            UserStanding.race_points,
+            UserStanding.season_points,
+            UserStanding.total_points,
+            UserStanding.race_rank,
+            UserStanding.season_rank,
+            UserStanding.rank.label("total_rank"),
+        )
+        .join(UserStanding.user)
+        .order_by(UserStanding.rank)
+    )
+    return _leaderboard_from_rows(_db_exec(stmt).all())
+
+
+def get_points_by_user():
+    return {
+        row.user_id: (row.race_points, row.season_points)
+        for row in _db_exec(_points_stmt())
+    }
+
+
+def apply_standings_delta(deltas):
+    """
+    Add points from `deltas` map user_id: [race delta, season delta]
+    to user standings and rerank all users. Caller commits.
+
+    Points are added by UPDATE ... SET points = points + delta, so that
+    concurrent scorings (jobs, admin) don't overwrite each other.
+    """
+    if not deltas:
+        return
+
+    upsert(
+        UserStanding,
+        [
+            {
+                "user_id": user_id,
+                "race_points": 0.0,
+                "season_points": 0.0,
+                "total_points": 0.0,
+            }
+            for user_id in deltas
+        ],
+        ["user_id"],
+    )
+    table = UserStanding.__table__
+    stmt = (
+        update(table)
+        .where(table.c.user_id == bindparam("_user_id"))
+        .values(
+            race_points=table.c.race_points + bindparam("race_delta"),
+            season_points=table.c.season_points + bindparam("season_delta"),
+            total_points=table.c.total_points
+            + bindparam("race_delta")
+            + bindparam("season_delta"),
+        )
+    )
+    db.session.execute(
+        stmt,
+        [
+            {"_user_id": user_id, "race_delta": race, "season_delta": season}
+            for user_id, (race, season) in deltas.items()
+        ],
+    )
+    rank_standings()
+
+
+def rank_standings():
+    stmt = select(
+        UserStanding.user_id,
+        UserStanding.race_points,
+        UserStanding.season_points,
+        UserStanding.total_points,
+        UserStanding.race_rank,
+        UserStanding.season_rank,
+        UserStanding.rank,
+        User.username,
+    ).join(UserStanding.user)
+    rows = _db_exec(stmt).all()
+
+    ranks = {row.user_id: {} for row in rows}
+    for rank_attr, points_attr in RANKS:
+        ordered = sorted(rows, key=lambda row: (-getattr(row, points_attr), row.username))
+        for order, row in enumerate(ordered, start=1):
+            ranks[row.user_id][rank_attr] = order
+
+    changes = [
+        {"user_id": row.user_id, **ranks[row.user_id]}
+        for row in rows
+        if any(getattr(row, attr) != ranks[row.user_id][attr] for attr, _ in RANKS)
+    ]
+    if changes:
+        _db_exec_bulk_update(changes)
+
+
+def rebuild_standings():
+    """
+    Recompute user standings from scratch from bets.
+
+    Return list of (username, stored total, recomputed total) for users
+    whose stored standing did not match.
+    """
+    stmt = select(UserStanding.user_id, UserStanding.total_points)
+    stored = {row.user_id: row.total_points for row in _db_exec(stmt)}
+
+    rows = _db_exec(_leaderboard_stmt()).all()
+    _db_exec(delete(UserStanding))
+    db.session.add_all(
+        UserStanding(
+            user_id=row.user_id,
+            race_points=row.race_points,
+            season_points=row.season_points,
+            total_points=row.total_points,
+            race_rank=row.race_rank,
+            season_rank=row.season_rank,
+            rank=row.total_rank,
+        )
+        for row in rows
+    )
+    db.session.commit()
+
+    return [
+        (row.username, stored.get(row.user_id, 0.0), row.total_points)
+        for row in rows
+        if stored.get(row.user_id, 0.0) != row.total_points
+    ]
+
+
+def _db_exec_bulk_update(changes):
+    return db.session.execute(update(UserStanding), changes)
+
+
+@click.command("rebuild-standings")
+@with_appcontext
+def rebuild_standings_command():
+    """Recompute user standings from bets and report differences."""
+    diffs = rebuild_standings()
+    for username, stored, rebuilt in diffs:
+        click.echo(f"{username}: stored {stored}, recomputed {rebuilt}")
+    click.echo(f"Standings rebuilt, {len(diffs)} differences found")
@@ -1,8 +1,13 @@
+from bisect import bisect_left
+from collections import namedtuple
 from datetime import datetime, timedelta, UTC
 from .models import Race, Competitor
 import pytz
+from sqlalchemy.dialects import postgresql, sqlite
 from app import db
-from app.models import Bet, Competitor, Race, RaceResult, User
+from app.models import CURRENT_SEASON, Bet, Competitor, Race, RaceResult, User
+from app.competitors import get_competitors
+from app.versioned_cache import VersionedCache
 
 LOCKS = {
     "quali": lambda race: race.quali_date,
@@ -25,24 +30,68 @@ def _db_exec(stmt):
     return db.session.execute(stmt)
 
 
+def current_races():
+    """select() of races of the current season, the others are history."""
+    return db.select(Race).where(Race.season == CURRENT_SEASON)
+
+
+def upsert(model, rows, index_elements, update_columns=()):
+    """
+    Insert all `rows` by single multi-row INSERT ... ON CONFLICT DO UPDATE.
+
+    On conflict with unique index over `index_elements` only `update_columns`
+    are updated from the new row, without them the existing row is kept.
+    Supported on PostgreSQL and SQLite.
+    """
+    if db.engine.dialect.name == "postgresql":
+        stmt = postgresql.insert(model)
+    else:
+        stmt = sqlite.insert(model)
+
+    stmt = stmt.values(rows)
+    if not update_columns:
+        return _db_exec(stmt.on_conflict_do_nothing(index_elements=index_elements))
+
+    stmt = stmt.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={column: stmt.excluded[column] for column in update_columns},
+    )
+    return _db_exec(stmt)
+
+
+# race is current until 6 hours after its start
+CURRENT_RACE_GRACE = timedelta(hours=6)
+
+ScheduleRace = namedtuple("ScheduleRace", ["id", "ext_id", "round", "race_date"])
+Schedule = namedtuple("Schedule", ["races", "dates", "last"])
+
+
+def load_schedule():
+    stmt = (
+        db.select(Race.id, Race.ext_id, Race.round, Race.race_date)
+        .where(Race.season == CURRENT_SEASON)
+        .order_by(Race.race_date)
+    )
+    races = [
+        ScheduleRace(id, ext_id, round, race_date.replace(tzinfo=pytz.utc))
+        for id, ext_id, round, race_date in _db_exec(stmt)
+    ]
+    # season finale, current race when the season is over
+    last = next((race for race in races if race.round == len(races)), None)
+    return Schedule(races, [race.race_date for race in races], last)
+
+
+SCHEDULE = VersionedCache("schedule", load_schedule)
+
+
 def get_current_race():
-    stmt = db.select(Race)
-    races = _db_exec(stmt).scalars().all()
-    now = datetime.now(UTC)
-    utc = now.replace(tzinfo=pytz.utc)
-    # now = datetime(2023, 12, 4, 18, 00)
-    time = utc - timedelta(hours=6)
-    candidates = []
-    last = []
-    last_round = len(races)  ## predelat nejak rozumne
-    for race in sorted(races, key=lambda x: x.race_date, reverse=True):
-        if race.race_date.replace(tzinfo=pytz.utc) >= time:
-            candidates.append(race)
-        if race.round == last_round:
-            last.append(race)
-    if not candidates:
-        candidates.extend(last)
-    return candidates[-1]
+    """First race that started less than 6 hours ago or later, the last one otherwise."""
+    schedule = SCHEDULE.get()
+    time = datetime.now(UTC) - CURRENT_RACE_GRACE
+    index = bisect_left(schedule.dates, time)
+    if index < len(schedule.races):
+        return schedule.races[index]
+    return schedule.last
 
 
 def date_or_none(date, shift=None):
@@ -103,14 +152,8 @@ def get_label_attr_season():
 
 
 def get_competitors_codes(type, active=True):
-    stmt = db.select(Competitor).where(Competitor.type == type)  # , Competitor.active
-    res = _db_exec(stmt)
-    codes = [item.code for item in res.scalars()]
-    return codes
+    return get_competitors().codes(type, active)
 
 
-def get_competitors_names(type):
-    stmt = db.select(Competitor).where(Competitor.type == type)  # , Competitor.active
-    res = _db_exec(stmt)
-    names = [item.name for item in res.scalars()]
-    return names
+def get_competitors_names(type, active=True):
+    return get_competitors().names(type, active)
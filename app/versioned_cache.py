@@ -0,0 +1,68 @@
+import logging
+import threading
+
+from sqlalchemy import select, update
+
+from app import db
+from app.models import CacheVersion
+
+LOG = logging.getLogger(__name__)
+
+CACHES = []
+
+
+def get_cache_version(name):
+    stmt = select(CacheVersion.version).where(CacheVersion.name == name)
+    return db.session.execute(stmt).scalar() or 0
+
+
+def bump_cache_version(name):
+    """Invalidate data cached under `name` in all processes. Caller commits."""
+    stmt = (
+        update(CacheVersion)
+        .where(CacheVersion.name == name)
+        .values(version=CacheVersion.version + 1)
+    )
+    if not db.session.execute(stmt).rowcount:
+        db.session.add(CacheVersion(name=name, version=1))
+
+
+class VersionedCache(object):
+    """
+    Value loaded once per process by `loader` and kept in memory.
+
+    It's loaded again only when version of `name` in DB changes, so any
+    process (app worker or script) may invalidate it by bump_cache_version.
+    Checking the version costs single primary key lookup.
+    """
+
+    def __init__(self, name, loader):
+        self._name = name
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._value = None
+        self._version = None
+        CACHES.append(self)
+
+    def get(self):
+        version = get_cache_version(self._name)
+        with self._lock:
+            if self._value is None or version != self._version:
+                LOG.debug("Loading %s cache, version %s", self._name, version)
+                self._value = self._loader()
+                self._version = version
+            return self._value
+
+    def invalidate(self):
+        bump_cache_version(self._name)
+        self.clear()
+
+    def clear(self):
+        """Drop value cached in this process only."""
+        with self._lock:
+            self._value = None
+
+
+def clear_caches():
+    for cache in CACHES:
+        cache.clear()
@@ -0,0 +1,92 @@
+"""
+Per-call cost of resolving the current race, before and after schedule cache.
+
+    python -m benchmarks.current_race [--races 24] [--number 2000] [db_uri]
+"""
+
+import argparse
+import timeit
+from datetime import datetime, timedelta, UTC
+
+import pytz
+
+from app import db
+from app.factory import create_app
+from app.models import Race
+from app.utils import _db_exec, get_current_race
+
+
+def get_current_race_linear():
+    """Implementation before the schedule cache, kept for comparison."""
+    stmt = db.select(Race)
+    races = _db_exec(stmt).scalars().all()
+    now = datetime.now(UTC)
+    utc = now.replace(tzinfo=pytz.utc)
+    time = utc - timedelta(hours=6)
+    candidates = []
+    last = []
+    last_round = len(races)
+    for race in sorted(races, key=lambda x: x.race_date, reverse=True):
+        if race.race_date.replace(tzinfo=pytz.utc) >= time:
+            candidates.append(race)
+        if race.round == last_round:
+            last.append(race)
+    if not candidates:
+        candidates.extend(last)
+    return candidates[-1]
+
+
+def add_races(count):
+    start = datetime.now(UTC).replace(tzinfo=None) - timedelta(weeks=count // 2)
+    db.session.add_all(
+        Race(
+            name=f"Grand Prix {round}",
+            round=round,
+            country="Country",
+            circuit_name=f"circuit {round}",
+            ext_id=f"circuit_{round}",
+            quali_date=start + timedelta(weeks=round, days=-1),
+            race_date=start + timedelta(weeks=round),
+            type="NORMAL",
+        )
+        for round in range(1, count + 1)
+    )
+    db.session.commit()
+
+
+def bench(app, func, number):
+    def request():
+        # new session per call, like a request
+        with app.app_context():
+            func()
+
+    request()  # warm up, fills the cache
+    return timeit.timeit(request, number=number) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("db_uri", nargs="?", default="sqlite://")
+    parser.add_argument("--races", type=int, default=24)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    app = create_app(args.db_uri)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        add_races(args.races)
+        assert get_current_race_linear().ext_id == get_current_race().ext_id
+
+    for name, func in (
+        ("linear", get_current_race_linear),
+        ("cached", get_current_race),
+    ):
+        print(f"{name:8} {bench(app, func, args.number) * 1e6:8.1f} us/call")
+
+    with app.app_context():
+        db.drop_all()
+
+
+if __name__ == "__main__":
+    main()
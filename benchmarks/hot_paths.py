@@ -0,0 +1,161 @@
+"""
+Time hot paths of the app against synthetic league in SQLite.
+
+    python -m benchmarks.hot_paths --users 200 --output bench.json
+
+Results (milliseconds per request) are written as JSON together with
+league size and git commit, so runs of different commits can be compared.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, UTC
+
+from sqlalchemy import update
+
+from app import db
+from app.factory import create_app
+from app.jobs import run_pending
+from app.models import Bet, User
+from app.versioned_cache import clear_caches
+from benchmarks.league import BET_FORM, build_league
+
+
+def _login(client, user_id):
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user_id)
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def measure(request, setup=None, number=20):
+    """Call `request` `number` times, `setup` before each call is not measured."""
+    times = []
+    for _ in range(number):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        response = request()
+        times.append(time.perf_counter() - start)
+        assert response.status_code < 400, response.status_code
+    times_ms = [t * 1000 for t in times]
+    return {
+        "number": number,
+        "min": round(min(times_ms), 3),
+        "median": round(statistics.median(times_ms), 3),
+        "mean": round(statistics.mean(times_ms), 3),
+        "max": round(max(times_ms), 3),
+    }
+
+
+def run(users, races, finished, number):
+    fd, path = tempfile.mkstemp(suffix=".sqlite3")
+    os.close(fd)
+    app = create_app(f"sqlite:///{path}")
+    app.config["TESTING"] = True
+    # queued jobs are run by the benchmark itself
+    app.config["JOBS_EXTERNAL_WORKER"] = True
+    try:
+        with app.app_context():
+            db.create_all()
+            # nothing cached from other DB in this process may be used
+            clear_caches()
+            start = time.perf_counter()
+            race_objs = build_league(users, races, finished)
+            build_time = time.perf_counter() - start
+            scored_id, scored = race_objs[finished - 1].id, race_objs[finished - 1].ext_id
+            upcoming = race_objs[finished].ext_id
+            user_id, admin_id = [
+                db.session.execute(
+                    db.select(User.id).where(User.username == username)
+                ).scalar()
+                for username in ("user_1", "admin")
+            ]
+
+        # requests run without app context pushed here, like in real server
+        client = app.test_client()
+        admin = app.test_client()
+        _login(client, user_id)
+        _login(admin, admin_id)
+
+        def unscore():
+            # evaluation writes every bet of the race again
+            with app.app_context():
+                db.session.execute(
+                    update(Bet).where(Bet.race_id == scored_id).values(result=0)
+                )
+                db.session.commit()
+
+        def compute_season():
+            # route only queues the job, scoring is measured together with it
+            response = admin.get("/compute_season")
+            with app.app_context():
+                run_pending()
+            return response
+
+        bonus_ok = {str(i): "on" for i in range(2, users + 2, 2)}
+        results = {
+            "top_players": measure(lambda: client.get("/top_players"), number=number),
+            "bet_result": measure(
+                lambda: client.get(f"/bet_result/{scored}"), number=number
+            ),
+            "evaluate_result_post": measure(
+                lambda: admin.post(f"/result/{scored}/evaluate", data=bonus_ok),
+                setup=unscore,
+                number=number,
+            ),
+            "compute_season_route": measure(compute_season, number=number),
+            "race_post": measure(
+                lambda: client.post(f"/race/{upcoming}", data=BET_FORM),
+                number=number,
+            ),
+        }
+    finally:
+        os.remove(path)
+
+    return {
+        "commit": _git_commit(),
+        "date": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "league": {
+            "users": users,
+            "races": races,
+            "finished": finished,
+            "build_seconds": round(build_time, 3),
+        },
+        "results_ms": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--races", type=int, default=24)
+    parser.add_argument("--finished", type=int, default=12)
+    parser.add_argument("--number", type=int, default=20)
+    parser.add_argument("--output", help="JSON file, printed to stdout if not set")
+    args = parser.parse_args()
+
+    out = run(args.users, args.races, args.finished, args.number)
+    text = json.dumps(out, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+"""
+Synthetic league: races, drivers, teams, users and their bets.
+
+Race results follow the dummy results of init_db.py, shifted by round so
+that every race has a different podium. To build it into DB file, e.g.
+for load testing:
+
+    python -m benchmarks.league sqlite:///league.sqlite3 --users 200
+"""
+
+import argparse
+import random
+from datetime import datetime, timedelta, UTC
+
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+
+from app import db
+from app.competitors import COMPETITORS
+from app.factory import create_app
+from app.main import KEY_TYPE_RANK_MAP, TEAM_MATCH_DRIVERS_MAP, constr_ext_id_name_map
+from app.models import Bet, Competitor, Race, RaceResult, User
+from app.scoring import score_race
+from app.utils import SCHEDULE
+from init_db import dummy_race_results, empty_result
+
+PASSWORD = "bench"
+# race bets form as posted from race page
+BET_FORM = {
+    "quali": "VER",
+    "first": "NOR",
+    "second": "PIA",
+    "third": "LEC",
+    "fastest_lap": "VER",
+    "safety_car": "VER",
+    "driver_of_the_day": "HAM",
+}
+
+DRIVERS = [code for pair in TEAM_MATCH_DRIVERS_MAP.values() for code in pair]
+# team names of the current season (the map goes both ways)
+TEAMS = [name for name in constr_ext_id_name_map if name[0].isupper()]
+
+# {(type, rank): dummy result} of a sprint weekend
+RESULT_PATTERN = {
+    (item["type"], int(item["rank"]) if item["rank"] else None): item
+    for item in dummy_race_results
+    if item["race_id"] == 6
+}
+
+
+def build_league(users=50, races=24, finished=12, seed=0):
+    """
+    Insert league into DB of current app, `finished` races have results.
+
+    Every 4th race is sprint weekend. Users bet on everything and finished
+    races are scored. Passwords are PASSWORD, "admin" user is added on top
+    of `users`.
+    """
+    rnd = random.Random(seed)
+
+    drivers = [
+        Competitor(ext_id=code.lower(), name=code, code=code, type="DRIVER")
+        for code in DRIVERS
+    ]
+    teams = [
+        Competitor(
+            ext_id=constr_ext_id_name_map[name], name=name, code="TO_UPDATE", type="TEAM"
+        )
+        for name in TEAMS
+    ]
+    for competitors in (drivers, teams):
+        positions = list(range(1, len(competitors) + 1))
+        rnd.shuffle(positions)
+        for competitor, position in zip(competitors, positions):
+            competitor.position = position
+            competitor.points = (len(competitors) - position) * 10
+
+    now = datetime.now(UTC).replace(tzinfo=None)
+    race_objs = []
+    for round in range(1, races + 1):
+        race_date = now + timedelta(weeks=round - finished - 1)
+        race_objs.append(
+            Race(
+                name=f"Grand Prix {round}",
+                round=round,
+                country="Australia",
+                country_code="au",
+                circuit_name=f"circuit {round}",
+                ext_id=f"circuit_{round}",
+                sprint_date=race_date - timedelta(days=1) if round % 4 == 0 else None,
+                quali_date=race_date - timedelta(days=1),
+                race_date=race_date,
+                type="SPRINT" if round % 4 == 0 else "NORMAL",
+                bonus_bet="Bonus question?",
+            )
+        )
+
+    password = generate_password_hash(PASSWORD, method="pbkdf2:sha256")
+    user_objs = [User(username="admin", password=password, role="ADMIN")] + [
+        User(username=f"user_{i}", password=password) for i in range(1, users + 1)
+    ]
+
+    db.session.add_all(drivers + teams + race_objs + user_objs)
+    db.session.flush()
+
+    results = []
+    for race in race_objs:
+        for bet_type, rank in KEY_TYPE_RANK_MAP.values():
+            if race.type == "NORMAL" and bet_type == "SPRINT":
+                continue
+            if race.round > finished:
+                results.append(empty_result(bet_type, rank, race.id))
+                continue
+            item = RESULT_PATTERN[bet_type, rank]
+            driver = None
+            if item.get("competitor_id"):
+                driver = drivers[(item["competitor_id"] - 1 + race.round) % len(drivers)]
+            results.append(
+                RaceResult(
+                    type=bet_type,
+                    rank=rank,
+                    competitor_id=driver and driver.id,
+                    value=driver.code if driver else item.get("value"),
+                    race_id=race.id,
+                )
+            )
+    db.session.add_all(results)
+
+    bets = []
+    for user in user_objs:
+        for race in race_objs:
+            joker = rnd.random() < 0.1
+            for bet_type, rank in KEY_TYPE_RANK_MAP.values():
+                if race.type == "NORMAL" and bet_type == "SPRINT":
+                    continue
+                value = "Bonus answer" if bet_type == "BONUS" else rnd.choice(DRIVERS)
+                bets.append(
+                    {
+                        "type": bet_type,
+                        "rank": rank,
+                        "value": value,
+                        "extra": "JOKER" if joker and bet_type == "RACE" else None,
+                        "race_id": race.id,
+                        "user_id": user.id,
+                    }
+                )
+        for bet_type, values in (("SEASON_DRIVER", DRIVERS), ("SEASON_TEAM", TEAMS)):
+            values = rnd.sample(values, len(values))
+            for rank, value in enumerate(values, start=1):
+                bets.append(
+                    {
+                        "type": bet_type,
+                        "rank": rank,
+                        "value": value,
+                        "extra": None,
+                        "race_id": None,
+                        "user_id": user.id,
+                    }
+                )
+    db.session.execute(insert(Bet), bets)
+    SCHEDULE.invalidate()
+    COMPETITORS.invalidate()
+    db.session.commit()
+
+    for race in race_objs[:finished]:
+        score_race(race)
+    return race_objs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("db_uri")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--races", type=int, default=24)
+    parser.add_argument("--finished", type=int, default=12)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    app = create_app(args.db_uri)
+    with app.app_context():
+        db.create_all()
+        build_league(args.users, args.races, args.finished, args.seed)
+    print(f"League of {args.users} users built in {args.db_uri}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+HTTP load test of the app with synthetic league (requires `pip install locust`).
+
+    python -m benchmarks.league sqlite:////tmp/league.sqlite3 --users 200
+    gunicorn 'app.factory:create_app("sqlite:////tmp/league.sqlite3")' -w 2 --bind 127.0.0.1:8000
+    locust -f benchmarks/locustfile.py --host http://127.0.0.1:8000 --users 200 --spawn-rate 20
+
+Locust users log in as user_1, user_2, ... of the league, so --users
+of locust should not be higher than number of league users.
+"""
+
+import itertools
+
+from locust import HttpUser, between, task
+
+from benchmarks.league import BET_FORM, PASSWORD
+
+USER_NUMBERS = itertools.count(1)
+
+
+class Player(HttpUser):
+    # race weekend visitors mostly check standings and bets of others
+    wait_time = between(1, 5)
+
+    def on_start(self):
+        username = f"user_{next(USER_NUMBERS)}"
+        self.client.post("/login", data={"username": username, "password": PASSWORD})
+        # /race redirects to the current race
+        response = self.client.get("/race", name="/race/<current>")
+        self.race_path = response.url.split(self.host, 1)[-1]
+
+    @task(5)
+    def top_players(self):
+        self.client.get("/top_players")
+
+    @task(3)
+    def bet_result(self):
+        self.client.get("/bet_result", name="/bet_result/<current>")
+
+    @task(2)
+    def races(self):
+        self.client.get("/races")
+
+    @task(2)
+    def race(self):
+        self.client.get(self.race_path, name="/race/<current>")
+
+    @task(1)
+    def submit_bets(self):
+        self.client.post(self.race_path, data=BET_FORM, name="/race/<current> POST")
@@ -0,0 +1,51 @@
+"""
+gunicorn settings, loaded automatically from the working directory.
+
+Workers write Prometheus metrics to files in shared directory so that
+/metrics served by any worker reports values aggregated from all of them.
+Every worker runs queued jobs in a thread, unless they are run by
+`flask run-jobs` (JOBS_EXTERNAL_WORKER set). Ergast client and job thread
+of a worker are stopped when the worker exits, after the running job
+finishes (within graceful timeout).
+"""
+
+import glob
+import os
+import tempfile
+
+os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), "f1_prometheus")
+)
+
+
+def on_starting(server):
+    # metrics of previous run are not valid anymore
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    os.makedirs(path, exist_ok=True)
+    for name in glob.glob(os.path.join(path, "*.db")):
+        os.remove(name)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    from app.jobs import has_worker, start_worker_thread
+
+    flask_app = getattr(worker, "wsgi", None)
+    # app that failed to load is replaced by error app
+    if hasattr(flask_app, "extensions") and not has_worker(flask_app):
+        start_worker_thread(flask_app)
+
+
+def worker_exit(server, worker):
+    from app.ergast_client.client import close_ergast_client
+    from app.jobs import stop_worker_thread
+
+    flask_app = getattr(worker, "wsgi", None)
+    if hasattr(flask_app, "extensions"):
+        stop_worker_thread(flask_app, timeout=server.cfg.graceful_timeout)
+        close_ergast_client(flask_app)
@@ -5,11 +5,26 @@ from app import db
 from app.factory import (
     create_app,
 )
-from app.ergast_client.client import Client
-from app.models import Race, Competitor, RaceResult, User
-from werkzeug.security import check_password_hash, generate_password_hash
+from app.ergast_client.client import get_ergast_client
+from app.models import RACE_RESULT_UNIQUE_KEY, Race, Competitor, RaceResult, User
 from sqlalchemy import select
+from werkzeug.security import check_password_hash, generate_password_hash
+from app.competitors import COMPETITORS
 from app.main import KEY_TYPE_RANK_MAP
+from app.utils import SCHEDULE, _db_exec, current_races, upsert
+
+# updated when the schedule changes, bonus bet of race is kept, circuit (ext_id)
+# of existing round must not change
+RACE_UPDATE_COLUMNS = (
+    "name",
+    "country",
+    "country_code",
+    "circuit_name",
+    "sprint_date",
+    "quali_date",
+    "race_date",
+    "type",
+)
 
 dummy_race_results = [
     {
@@ -116,11 +131,6 @@ dummy_race_results = [
     },
 ]
 
-db_uri = None
-if len(sys.argv) == 2:
-    db_uri = sys.argv[1]
-app = create_app(db_uri)
-
 
 def empty_result(bet_type, rank, race_id):
     data = {
@@ -132,31 +142,106 @@ def empty_result(bet_type, rank, race_id):
     return RaceResult.from_data(data)
 
 
-with app.app_context():
-    db.create_all()
-    with Client("https://api.jolpi.ca/") as client:
-        races = Race.race_from_data(client.get_current_schedule().result())
-        drivers = Competitor.drivers_from_data(client.get_drivers().result())
-        teams = Competitor.teams_from_data(client.get_constructors().result())
+class ScheduleChanged(Exception):
+    pass
+
+
+def seed(schedule, drivers, teams):
+    """
+    Insert races of `schedule`, `drivers`, `teams` and empty results of the
+    races by one statement per table. Existing races and competitors (by
+    season and round, type and ext_id) are updated, existing results are
+    kept, so seeding can be repeated. Caller commits.
+
+    Raise ScheduleChanged if circuit of an existing round changed, e.g.
+    race was cancelled and rounds renumbered: bets and results of the race
+    would move to another circuit.
+    """
+    races = [
+        Race.values_from_data(race) for race in schedule["MRData"]["RaceTable"]["Races"]
+    ]
+    stmt = select(Race.season, Race.round, Race.ext_id).where(
+        Race.season.in_({race["season"] for race in races})
+    )
+    existing = {(season, round): ext_id for season, round, ext_id in _db_exec(stmt)}
+    moved = [
+        f"round {race['round']}: {existing[key]} -> {race['ext_id']}"
+        for race in races
+        if (key := (race["season"], race["round"])) in existing
+        and existing[key] != race["ext_id"]
+    ]
+    if moved:
+        raise ScheduleChanged(
+            "Circuits of existing rounds changed, fix races manually: "
+            + ", ".join(moved)
+        )
+
+    upsert(Race, races, ["season", "round"], RACE_UPDATE_COLUMNS)
 
-        db.session.add_all(races + drivers + teams)
+    competitors = [Competitor.driver_values_from_data(item) for item in drivers] + [
+        Competitor.team_values_from_data(item) for item in teams
+    ]
+    if competitors:
+        upsert(
+            Competitor,
+            competitors,
+            ["type", "ext_id"],
+            update_columns=("name", "code", "active"),
+        )
 
-        races = db.session.execute(select(Race)).scalars().all()
-        for r in races:
-            for val in KEY_TYPE_RANK_MAP.values():
-                if r.type == "NORMAL" and val[0] == "SPRINT":
-                    continue
-                new_item = empty_result(val[0], val[1], r.id)
-                db.session.add(new_item)
+    results = [
+        RaceResult.values_from_data(
+            {"type": bet_type, "rank": rank, "race_id": race.id}
+        )
+        for race in _db_exec(current_races()).scalars()
+        for bet_type, rank in KEY_TYPE_RANK_MAP.values()
+        if race.type == "SPRINT" or bet_type != "SPRINT"
+    ]
+    if results:
+        upsert(RaceResult, results, RACE_RESULT_UNIQUE_KEY)
+
+    SCHEDULE.invalidate()
+    COMPETITORS.invalidate()
+
+
+def main(db_uri=None):
+    app = create_app(db_uri)
+
+    with app.app_context():
+        db.create_all()
+        # fetched before writing, transaction is not held open over network
+        client = get_ergast_client()
+        schedule = client.get_current_schedule().result()
+        drivers = list(client.iter_drivers())
+        teams = list(client.iter_constructors())
+
+        try:
+            seed(schedule, drivers, teams)
+        except ScheduleChanged as err:
+            sys.exit(str(err))
 
         if os.getenv("F1TEST"):
-            new_user = User(
-                username="test",
-                password=generate_password_hash("test", method="pbkdf2:sha256"),
+            upsert(
+                User,
+                [
+                    {
+                        "username": "test",
+                        "password": generate_password_hash(
+                            "test", method="pbkdf2:sha256"
+                        ),
+                    }
+                ],
+                ["username"],
+            )
+            upsert(
+                RaceResult,
+                [RaceResult.values_from_data(item) for item in dummy_race_results],
+                RACE_RESULT_UNIQUE_KEY,
+                update_columns=("competitor_id", "value"),
             )
-
-            db.session.add(new_user)
-            race_results = RaceResult.from_data(dummy_race_results)
-            db.session.add_all(race_results)
 
         db.session.commit()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) == 2 else None)
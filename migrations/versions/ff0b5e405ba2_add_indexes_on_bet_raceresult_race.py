@@ -0,0 +1,124 @@
+"""add indexes on bet, raceresult and race lookup columns
+
+Revision ID: ff0b5e405ba2
+Revises: e0f2e8df99d2
+Create Date: 2026-10-18 11:02:17.584210
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'ff0b5e405ba2'
+down_revision = 'e0f2e8df99d2'
+branch_labels = None
+depends_on = None
+
+
+def _rebuild_standings():
+    """Same as the backfill in e0f2e8df99d2, `flask rebuild-standings`."""
+    bet = sa.table(
+        'bet',
+        sa.column('user_id', sa.Integer),
+        sa.column('type', sa.String),
+        sa.column('result', sa.Float),
+        sa.column('extra', sa.String),
+    )
+    user = sa.table('user', sa.column('id', sa.Integer), sa.column('username', sa.String))
+    user_standing = sa.table(
+        'user_standing',
+        sa.column('user_id', sa.Integer),
+        sa.column('race_points', sa.Float),
+        sa.column('season_points', sa.Float),
+        sa.column('total_points', sa.Float),
+        sa.column('race_rank', sa.Integer),
+        sa.column('season_rank', sa.Integer),
+        sa.column('rank', sa.Integer),
+    )
+
+    is_season = bet.c.type.in_(('SEASON_DRIVER', 'SEASON_TEAM'))
+    team_match = sa.case((bet.c.extra == 'MATCH OK', 0.5), else_=0.0)
+    stmt = (
+        sa.select(
+            user.c.id,
+            user.c.username,
+            sa.func.sum(sa.case((is_season, 0.0), else_=bet.c.result)),
+            sa.func.sum(sa.case((is_season, bet.c.result + team_match), else_=0.0)),
+        )
+        .select_from(bet.join(user, bet.c.user_id == user.c.id))
+        .group_by(user.c.id, user.c.username)
+    )
+    rows = [
+        {
+            'user_id': user_id,
+            'username': username,
+            'race_points': race_points,
+            'season_points': season_points,
+            'total_points': race_points + season_points,
+        }
+        for user_id, username, race_points, season_points in op.get_bind().execute(stmt)
+    ]
+    for rank, points in (
+        ('race_rank', 'race_points'),
+        ('season_rank', 'season_points'),
+        ('rank', 'total_points'),
+    ):
+        ordered = sorted(rows, key=lambda row: (-row[points], row['username']))
+        for order, row in enumerate(ordered, start=1):
+            row[rank] = order
+
+    for row in rows:
+        del row['username']
+    op.execute(user_standing.delete())
+    if rows:
+        op.bulk_insert(user_standing, rows)
+
+
+def upgrade():
+    # keep only the latest bet if there are duplicates, unique index can't be created otherwise
+    deleted = op.get_bind().execute(sa.text(
+        'DELETE FROM bet WHERE id NOT IN ('
+        'SELECT max(id) FROM bet '
+        'GROUP BY user_id, coalesce(race_id, 0), type, coalesce(rank, 0))'
+    )).rowcount
+    if deleted:
+        # standings backfilled by e0f2e8df99d2 counted the removed bets too
+        _rebuild_standings()
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('bet', schema=None) as batch_op:
+        batch_op.create_index('ix_bet_race_id_user_id', ['race_id', 'user_id'], unique=False)
+        batch_op.create_index('ix_bet_user_id_type_rank', ['user_id', 'type', 'rank'], unique=False)
+
+    with op.batch_alter_table('race', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_race_ext_id'), ['ext_id'], unique=False)
+
+    with op.batch_alter_table('raceresult', schema=None) as batch_op:
+        batch_op.create_index('ix_raceresult_race_id_type_rank', ['race_id', 'type', 'rank'], unique=False)
+
+    # ### end Alembic commands ###
+
+    op.create_index(
+        'uq_bet_user_id_race_id_type_rank',
+        'bet',
+        ['user_id', sa.text('coalesce(race_id, 0)'), 'type', sa.text('coalesce(rank, 0)')],
+        unique=True,
+    )
+
+
+def downgrade():
+    op.drop_index('uq_bet_user_id_race_id_type_rank', table_name='bet')
+
+    # ### commands auto generated by Alembic - please adjust! ###
+    with op.batch_alter_table('raceresult', schema=None) as batch_op:
+        batch_op.drop_index('ix_raceresult_race_id_type_rank')
+
+    with op.batch_alter_table('race', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_race_ext_id'))
+
+    with op.batch_alter_table('bet', schema=None) as batch_op:
+        batch_op.drop_index('ix_bet_user_id_type_rank')
+        batch_op.drop_index('ix_bet_race_id_user_id')
+
+    # ### end Alembic commands ###
@@ -0,0 +1,118 @@
+from datetime import datetime
+
+import pytest
+
+from app import db
+from app.ergast_client.client import close_ergast_client
+from app.factory import create_app
+from app.models import Bet, Competitor, Race, RaceResult, User
+from app.versioned_cache import clear_caches
+
+DRIVERS = ["VER", "NOR", "LEC", "HAM", "RUS"]
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.delenv("F1TEST", raising=False)
+    flask_app = create_app("sqlite://")
+    flask_app.config["TESTING"] = True
+    # jobs are run by tests by run_pending()
+    flask_app.config["JOBS_EXTERNAL_WORKER"] = True
+    with flask_app.app_context():
+        db.create_all()
+        clear_caches()
+        yield flask_app
+        db.session.remove()
+        db.drop_all()
+    close_ergast_client(flask_app)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def login(client, user):
+    with client.session_transaction() as session:
+        session["_user_id"] = str(user.id)
+
+
+def add_race(round=1, type="NORMAL", race_date=datetime(2026, 3, 8, 4, 0)):
+    race = Race(
+        name=f"Grand Prix {round}",
+        round=round,
+        country="Australia",
+        circuit_name=f"circuit {round}",
+        ext_id=f"circuit_{round}",
+        sprint_date=race_date if type == "SPRINT" else None,
+        quali_date=race_date,
+        race_date=race_date,
+        type=type,
+    )
+    db.session.add(race)
+    db.session.commit()
+    return race
+
+
+def add_user(username, role=None):
+    user = User(username=username, password="x", role=role)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def add_drivers(codes=DRIVERS):
+    drivers = [
+        Competitor(ext_id=code.lower(), name=code, code=code, type="DRIVER")
+        for code in codes
+    ]
+    db.session.add_all(drivers)
+    db.session.commit()
+    return drivers
+
+
+def add_teams(count=11):
+    teams = [
+        Competitor(ext_id=f"team_{i}", name=f"Team {i}", code="TO_UPDATE", type="TEAM")
+        for i in range(1, count + 1)
+    ]
+    db.session.add_all(teams)
+    db.session.commit()
+    return teams
+
+
+def add_results(race, results):
+    """results: {(type, rank): value}"""
+    db.session.add_all(
+        RaceResult(type=type, rank=rank, value=value, race_id=race.id)
+        for (type, rank), value in results.items()
+    )
+    db.session.commit()
+
+
+def add_bets(user, race, bets, extra=None):
+    """bets: {(type, rank): value}"""
+    db.session.add_all(
+        Bet(
+            type=type,
+            rank=rank,
+            value=value,
+            extra=extra if type != "QUALI" else None,
+            race_id=race.id if race else None,
+            user_id=user.id,
+        )
+        for (type, rank), value in bets.items()
+    )
+    db.session.commit()
+
+
+RACE_RESULTS = {
+    ("QUALI", None): "VER",
+    ("RACE", 1): "VER",
+    ("RACE", 2): "NOR",
+    ("RACE", 3): "LEC",
+    ("SC", None): "1",
+    ("FASTEST", None): "HAM",
+    ("BONUS", None): "answer",
+    ("DRIVERDAY", None): "NOR",
+}
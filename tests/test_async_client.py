@@ -0,0 +1,81 @@
+import asyncio
+import os
+
+import httpx
+import pytest
+
+from app.ergast_client.async_client import AsyncClient
+from app.ergast_client.client import Client
+from app.ergast_client.ratelimit import RateLimiter
+from app.ergast_client.stub_server import StubServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "data", "ergast")
+
+
+class CountingLimiter(RateLimiter):
+    def __init__(self):
+        super().__init__(100, 100)
+        self.reserved = 0
+
+    def reserve(self):
+        self.reserved += 1
+        return super().reserve()
+
+
+@pytest.fixture
+def stub_server():
+    with StubServer(FIXTURES_DIR) as server:
+        yield server
+
+
+def _run(url, limiter, call, **kwargs):
+    async def main():
+        async with AsyncClient(url, rate_limiter=limiter, **kwargs) as client:
+            return await call(client)
+
+    return asyncio.run(main())
+
+
+def test_same_data_as_client(stub_server):
+    limiter = RateLimiter(100, 100)
+    with Client(stub_server.url, rate_limiter=limiter) as client:
+        expected = {
+            "result": client.get_result(2).result(),
+            "standings": client.get_driver_standings().result(),
+        }
+
+    async def call(client):
+        return {
+            "result": await client.get_result(2),
+            "standings": await client.get_driver_standings(),
+        }
+
+    assert _run(stub_server.url, limiter, call) == expected
+
+
+def test_season_results(stub_server):
+    limiter = CountingLimiter()
+
+    out = _run(
+        stub_server.url,
+        limiter,
+        lambda client: client.get_season_results([1, 2], sprint_rounds={2}),
+        concurrency=2,
+    )
+
+    assert sorted(out) == [1, 2]
+    assert sorted(out[1]) == ["fastest_lap", "quali", "race"]
+    sprint = out[2]["sprint"]["MRData"]["RaceTable"]["Races"][0]["SprintResults"]
+    assert sprint[0]["Driver"]["code"] == "PIA"
+    assert limiter.reserved == 7
+    # connections are kept alive, never more than allowed concurrency
+    assert len(stub_server.connections) <= 2
+
+
+def test_missing_resource_retried_then_raised(stub_server, monkeypatch):
+    monkeypatch.setattr("app.ergast_client.async_client.RETRY_SLEEP", 0)
+    limiter = CountingLimiter()
+
+    with pytest.raises(httpx.HTTPStatusError):
+        _run(stub_server.url, limiter, lambda client: client.get_result(99))
+    assert limiter.reserved == 3
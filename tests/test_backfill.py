@@ -0,0 +1,88 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from app import db
+from app.backfill import backfill
+from app.ergast_client.async_client import AsyncClient
+from app.ergast_client.fixtures import REPLAY, FixtureNotFound
+from app.models import Competitor, Race, RaceResult
+from app.utils import _db_exec, current_races, get_competitors_codes
+from tests.conftest import add_drivers
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "data", "ergast")
+
+
+@pytest.fixture
+def season_2019(tmp_path):
+    """Recorded 2026 season served as 2019."""
+    src = os.path.join(FIXTURES_DIR, "ergast", "f1")
+    dst = tmp_path / "fixtures" / "ergast" / "f1"
+    shutil.copytree(os.path.join(src, "2026"), dst / "2019")
+    with open(os.path.join(src, "2026.json")) as f:
+        schedule = json.load(f)
+    for race in schedule["MRData"]["RaceTable"]["Races"]:
+        race["season"] = "2019"
+    (dst / "2019.json").write_text(json.dumps(schedule))
+    return dst / "2019"
+
+
+def _backfill(fixtures, checkpoint):
+    def client(season):
+        return AsyncClient(
+            year=season, fixtures_dir=str(fixtures.parents[2]), fixtures_mode=REPLAY
+        )
+
+    return backfill([2019], str(checkpoint), client_factory=client)
+
+
+def test_backfill_resumes_from_checkpoint(app, season_2019, tmp_path):
+    add_drivers(["VER"])  # of current season, ext_id "ver"
+    checkpoint = tmp_path / "checkpoint"
+    round_2 = season_2019 / "2" / "results.json"
+    round_2.rename(tmp_path / "results.json")
+
+    # interrupted: round 2 not published, round 1 fetched
+    with pytest.raises(FixtureNotFound):
+        _backfill(season_2019, checkpoint)
+    assert db.session.query(Race).count() == 0
+    assert (checkpoint / "2019" / "1.json").exists()
+
+    # round 1 is not fetched again
+    (tmp_path / "results.json").rename(round_2)
+    shutil.rmtree(season_2019 / "1")
+    assert _backfill(season_2019, checkpoint) == [2019]
+
+    races = db.session.query(Race).filter_by(season=2019).order_by(Race.round).all()
+    assert [race.ext_id for race in races] == ["albert_park", "shanghai"]
+    results = {
+        (r.type, r.rank): r.value
+        for r in db.session.query(RaceResult).filter_by(race_id=races[1].id)
+    }
+    assert results == {
+        ("QUALI", None): "VER",
+        ("SPRINT", None): "PIA",
+        ("FASTEST", None): "LEC",
+        ("RACE", 1): "NOR",
+        ("RACE", 2): "VER",
+        ("RACE", 3): "PIA",
+    }
+    assert _backfill(season_2019, checkpoint) == []
+
+
+def test_backfill_keeps_history_out_of_game(app, season_2019, tmp_path):
+    # driver of the current season racing in 2019 too
+    db.session.add(
+        Competitor(ext_id="max_verstappen", name="Max", code="VER", type="DRIVER")
+    )
+    db.session.commit()
+
+    _backfill(season_2019, tmp_path / "checkpoint")
+
+    assert _db_exec(current_races()).scalars().all() == []
+    assert get_competitors_codes("DRIVER") == ["VER"]
+    assert db.session.query(Competitor).filter_by(code="VER").count() == 1
+    imported = db.session.query(Competitor).filter_by(active=False).count()
+    assert imported == 5 + 4
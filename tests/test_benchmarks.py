@@ -0,0 +1,24 @@
+from benchmarks import hot_paths
+from benchmarks.league import build_league
+from app.models import Bet, Race, UserStanding
+
+
+def test_build_league(app):
+    build_league(users=3, races=4, finished=2)
+
+    assert Race.query.count() == 4
+    # 8 bets per race, 9 on sprint weekend, 22 + 11 season bets, admin included
+    assert Bet.query.count() == 4 * (3 * 8 + 9 + 33)
+    assert UserStanding.query.count() == 4
+
+
+def test_hot_paths():
+    out = hot_paths.run(users=3, races=4, finished=2, number=1)
+
+    assert set(out["results_ms"]) == {
+        "top_players",
+        "bet_result",
+        "evaluate_result_post",
+        "compute_season_route",
+        "race_post",
+    }
@@ -0,0 +1,150 @@
+import json
+
+import pytest
+import requests
+
+from app.ergast_client.cache import FINAL, ResponseCache
+from app.ergast_client.client import Client
+from app.ergast_client.ratelimit import RateLimiter
+
+URL = "http://localhost/ergast/f1/"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeSession:
+    def __init__(self, status=200, body=None, headers=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+        self.requests = []
+
+    def mount(self, prefix, adapter):
+        pass
+
+    def close(self):
+        pass
+
+    def request(self, method, url, headers=None):
+        self.requests.append((url, headers))
+        response = requests.Response()
+        response.status_code = self.status
+        response.url = url
+        response.headers.update(self.headers)
+        response._content = json.dumps(self.body).encode()
+        return response
+
+
+def _races(races):
+    return {"MRData": {"RaceTable": {"Races": races}}}
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def response_cache(tmp_path, clock):
+    return ResponseCache(str(tmp_path / "cache.sqlite3"), clock=clock)
+
+
+@pytest.fixture
+def fake_session(monkeypatch):
+    def fake_session(**kwargs):
+        session = FakeSession(**kwargs)
+        monkeypatch.setattr(requests, "Session", lambda: session)
+        return session
+
+    return fake_session
+
+
+def _client(response_cache):
+    return Client("http://localhost/", RateLimiter(4, 1), response_cache)
+
+
+def test_cached_response_served_without_request(response_cache, fake_session):
+    session = fake_session(body={"MRData": {"DriverTable": {}}})
+
+    with _client(response_cache) as client:
+        first = client.get_drivers().result()
+        second = client.get_drivers().result()
+
+    assert first == second == {"MRData": {"DriverTable": {}}}
+    assert len(session.requests) == 1
+
+
+def test_expired_response_revalidated(response_cache, clock, fake_session):
+    session = fake_session(body={"MRData": {}}, headers={"ETag": '"abc"'})
+    with _client(response_cache) as client:
+        client.get_driver_standings().result()
+        clock.now += 11 * 60
+        session.status = 304
+        assert client.get_driver_standings().result() == {"MRData": {}}
+        # revalidated response is fresh again
+        client.get_driver_standings().result()
+
+    assert [headers for _, headers in session.requests] == [
+        None,
+        {"If-None-Match": '"abc"'},
+    ]
+
+
+RACE_START = 1772942400  # 2026-03-08 04:00 UTC
+
+
+def test_final_results_cached_forever(response_cache, clock, fake_session):
+    clock.now = RACE_START + 4 * 24 * 3600
+    session = fake_session(body=_races([{"date": "2026-03-08", "time": "04:00:00Z"}]))
+    with _client(response_cache) as client:
+        client.get_result(1).result()
+        clock.now += 10**9
+        client.get_result(1).result()
+
+    assert len(session.requests) == 1
+    assert response_cache.get(session.requests[0][0]).expires_at is None
+
+
+def test_provisional_results_refetched(response_cache, clock, fake_session):
+    clock.now = RACE_START + 3600
+    session = fake_session(body=_races([{"date": "2026-03-08", "time": "04:00:00Z"}]))
+    with _client(response_cache) as client:
+        client.get_result(1).result()
+        client.get_result(1).result()
+        # classification changed by penalty
+        clock.now += 11 * 60
+        session.body = _races([{"date": "2026-03-08", "Results": [{}]}])
+        assert client.get_result(1).result() == session.body
+
+    assert len(session.requests) == 2
+
+
+def test_missing_results_not_cached(response_cache, fake_session):
+    session = fake_session(body=_races([]))
+    with _client(response_cache) as client:
+        client.get_result(1).result()
+        client.get_result(1).result()
+
+    assert len(session.requests) == 2
+
+
+@pytest.mark.parametrize(
+    "endpoint, ttl",
+    [
+        ("2026.json", 24 * 3600),
+        ("2026/drivers/", 24 * 3600),
+        ("2026/constructorstandings/", 600),
+        ("2026/3/qualifying.json", FINAL),
+        ("2026/3/fastest/1/results.json", FINAL),
+    ],
+)
+def test_ttl(response_cache, clock, endpoint, ttl):
+    clock.now = RACE_START + 4 * 24 * 3600
+    body = json.dumps(_races([{"date": "2026-03-08"}]))
+    assert response_cache._ttl(URL + endpoint, body) == ttl
@@ -0,0 +1,35 @@
+from app import db
+from app.competitors import get_competitors
+from app.models import Competitor
+from app.utils import get_competitors_codes, get_competitors_names
+from app.versioned_cache import bump_cache_version
+from tests.conftest import DRIVERS, add_drivers, add_teams
+
+
+def test_lookups(app):
+    add_drivers()
+    add_teams(2)
+
+    competitors = get_competitors()
+
+    assert competitors.codes("DRIVER") == DRIVERS
+    assert competitors.names("TEAM") == ["Team 1", "Team 2"]
+    ver = competitors.by_code("DRIVER", "VER")
+    assert competitors.by_id(ver.id) == ver
+    assert competitors.by_ext_id("DRIVER", ver.ext_id) == ver
+    assert competitors.by_name("DRIVER", ver.name) == ver
+    assert competitors.by_code("TEAM", "VER") is None
+
+
+def test_loaded_once(app):
+    add_drivers()
+    assert get_competitors_codes("DRIVER") == DRIVERS
+
+    db.session.add(Competitor(ext_id="bearman", name="BEA", code="BEA", type="DRIVER"))
+    db.session.commit()
+    assert get_competitors_codes("DRIVER") == DRIVERS
+
+    bump_cache_version("competitors")
+    db.session.commit()
+    assert get_competitors_codes("DRIVER") == DRIVERS + ["BEA"]
+    assert get_competitors_names("TEAM") == []
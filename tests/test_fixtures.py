@@ -0,0 +1,298 @@
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import threading
+from datetime import datetime
+
+import pytest
+from sqlalchemy import update
+
+import init_db
+
+from app import db
+from app.ergast_client import client as client_module
+from app.ergast_client.client import Client, close_ergast_client, get_ergast_client
+from app.ergast_client.fixtures import RECORD, FixtureNotFound
+from app.ergast_client.ratelimit import RateLimiter
+from app.ergast_client.stub_server import StubServer
+from app.jobs import run_pending
+from app.models import Competitor, Race, RaceResult
+from app.results import get_result_for_round, get_session_result
+from app.versioned_cache import get_cache_version
+from tests.conftest import add_bets, add_user, login
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "data", "ergast")
+ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
+
+
+def _fixture(path):
+    with open(os.path.join(FIXTURES_DIR, "ergast", "f1", path)) as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def replay(monkeypatch):
+    monkeypatch.setattr(client_module, "FIXTURES_DIR", FIXTURES_DIR)
+
+
+@pytest.fixture
+def stub_server():
+    with StubServer(FIXTURES_DIR) as server:
+        yield server
+
+
+def test_replay_get_result_for_round(app, replay):
+    assert get_result_for_round(2, is_sprint=True) == {
+        "quali": "VER",
+        "sprint": "PIA",
+        "fastest_lap": "LEC",
+        "first": "NOR",
+        "second": "VER",
+        "third": "PIA",
+        "podium": ["NOR", "VER", "PIA"],
+    }
+
+
+def test_replay_get_session_result(app, replay):
+    assert get_session_result(2, "QUALI") == {"quali": "VER"}
+    assert get_session_result(2, "SPRINT") == {"sprint": "PIA"}
+    assert get_session_result(2, "RACE") == {
+        "first": "NOR",
+        "second": "VER",
+        "third": "PIA",
+        "fastest_lap": "LEC",
+    }
+
+
+def test_replay_missing_fixture(replay):
+    with Client() as client:
+        with pytest.raises(FixtureNotFound):
+            client.get_result(99).result()
+
+
+def test_stub_server(stub_server):
+    with Client(stub_server.url, rate_limiter=RateLimiter(100, 100)) as client:
+        assert client.get_drivers().result() == _fixture("2026/drivers.json")
+
+
+def test_app_client_keeps_connection_alive(app, stub_server, monkeypatch):
+    monkeypatch.setattr(client_module, "API_URL", stub_server.url)
+    monkeypatch.setattr(client_module, "RATE_LIMITER", RateLimiter(100, 100))
+
+    client = get_ergast_client()
+    for _ in range(5):
+        get_ergast_client().get_drivers().result()
+
+    assert get_ergast_client() is client
+    assert len(stub_server.connections) == 1
+    close_ergast_client(app)
+    assert get_ergast_client() is not client
+
+
+def test_client_session_per_thread(stub_server):
+    with Client(stub_server.url, rate_limiter=RateLimiter(100, 100)) as client:
+        sessions = []
+        thread = threading.Thread(target=lambda: sessions.append(client._session))
+        thread.start()
+        thread.join()
+        sessions.append(client._session)
+        futures = [client.get_drivers() for _ in range(8)]
+        assert all(f.result() == _fixture("2026/drivers.json") for f in futures)
+
+    assert sessions[0] is not sessions[1]
+    adapters = {session.get_adapter(stub_server.url) for session in sessions}
+    assert adapters == {client._adapter}
+    # connections are pooled by the shared adapter
+    assert len(stub_server.connections) <= client_module.REQUESTS_MAX_WORKERS
+
+
+def _drivers_page(codes, limit, offset, total):
+    drivers = [{"driverId": code.lower(), "code": code} for code in codes]
+    return {
+        "MRData": {
+            "limit": str(limit),
+            "offset": str(offset),
+            "total": str(total),
+            "DriverTable": {"Drivers": drivers},
+        }
+    }
+
+
+def test_paginate(tmp_path):
+    codes = ["VER", "NOR", "LEC", "HAM", "RUS"]
+    pages = {
+        "drivers__limit=2": _drivers_page(codes[:2], 2, 0, 5),
+        "drivers__limit=2_offset=2": _drivers_page(codes[2:4], 2, 2, 5),
+        "drivers__limit=2_offset=4": _drivers_page(codes[4:], 2, 4, 5),
+    }
+    page_dir = tmp_path / "ergast" / "f1" / "2026"
+    page_dir.mkdir(parents=True)
+    for name, page in pages.items():
+        (page_dir / f"{name}.json").write_text(json.dumps(page))
+
+    with StubServer(str(tmp_path)) as server:
+        with Client(server.url, rate_limiter=RateLimiter(100, 100)) as client:
+            drivers = client.iter_drivers(limit=2)
+            assert server.connections == set()  # nothing requested yet
+            assert [driver["code"] for driver in drivers] == codes
+
+
+def test_record(stub_server, tmp_path):
+    with Client(
+        stub_server.url,
+        rate_limiter=RateLimiter(100, 100),
+        fixtures_dir=str(tmp_path),
+        fixtures_mode=RECORD,
+    ) as client:
+        client.get_current_schedule().result()
+
+    with open(tmp_path / "ergast" / "f1" / "2026.json") as f:
+        assert json.load(f) == _fixture("2026.json")
+
+
+def test_replay_update_standings(app, client, replay):
+    db.session.add_all(
+        Competitor.drivers_from_data(_fixture("2026/drivers.json"))
+        + Competitor.teams_from_data(_fixture("2026/constructors.json"))
+    )
+    db.session.commit()
+    login(client, add_user("admin", role="ADMIN"))
+
+    assert client.get("/guess_overview/season/load").status_code == 202
+    assert run_pending() == 1
+
+    positions = {item.code: item.position for item in db.session.query(Competitor)}
+    assert positions["PIA"] == 4
+    mclaren = db.session.query(Competitor).filter_by(ext_id="mclaren").one()
+    assert mclaren.position == 1
+    assert get_cache_version("competitors") == 1
+
+
+def test_replay_update_standings_projection(app, client, replay, monkeypatch):
+    monkeypatch.setenv("SEASON_PROJECTION", "1")
+    db.session.add_all(
+        Competitor.drivers_from_data(_fixture("2026/drivers.json"))
+        + Competitor.teams_from_data(_fixture("2026/constructors.json"))
+    )
+    db.session.commit()
+    admin = add_user("admin", role="ADMIN")
+    add_bets(admin, None, {("SEASON_DRIVER", 4): "PIA", ("SEASON_TEAM", 1): "McLaren"})
+    login(client, admin)
+
+    assert client.get("/guess_overview/season/load").status_code == 202
+    assert run_pending() == 1
+
+    assert sorted(bet.result for bet in admin.bets) == [2, 7]
+    assert admin.standing.season_points == 9
+
+
+def test_replay_init_db(tmp_path):
+    env = dict(os.environ, F1_ERGAST_FIXTURES=FIXTURES_DIR)
+    env.pop("F1TEST", None)
+    db_path = tmp_path / "init.sqlite3"
+
+    # repeated seeding adds nothing
+    for _ in range(2):
+        subprocess.run(
+            [sys.executable, "init_db.py", f"sqlite:///{db_path}"],
+            cwd=ROOT_DIR,
+            env=env,
+            check=True,
+        )
+
+    with sqlite3.connect(db_path) as conn:
+        races = conn.execute(
+            "SELECT ext_id, type, country_code FROM race ORDER BY round"
+        ).fetchall()
+        competitors = conn.execute("SELECT count(*) FROM competitor").fetchone()
+        results = conn.execute("SELECT count(*) FROM raceresult").fetchone()
+        versions = conn.execute("SELECT name, version FROM cache_version").fetchall()
+    assert races == [("albert_park", "NORMAL", "au"), ("shanghai", "SPRINT", "cn")]
+    assert competitors == (10,)
+    assert results == (8 + 9,)
+    assert sorted(versions) == [("competitors", 2), ("schedule", 2)]
+
+
+def test_replay_update_races_date(tmp_path):
+    env = dict(os.environ, F1_ERGAST_FIXTURES=FIXTURES_DIR)
+    env.pop("F1TEST", None)
+    db_uri = f"sqlite:///{tmp_path / 'update.sqlite3'}"
+    subprocess.run(
+        [sys.executable, "init_db.py", db_uri], cwd=ROOT_DIR, env=env, check=True
+    )
+    with sqlite3.connect(tmp_path / "update.sqlite3") as conn:
+        # the same circuit in imported past season
+        conn.execute(
+            "INSERT INTO race (name, season, round, country, circuit_name, ext_id, "
+            "quali_date, race_date, type) SELECT name, 2019, round, country, "
+            "circuit_name, ext_id, '2019-03-16', '2019-03-17', type FROM race "
+            "WHERE ext_id = 'albert_park'"
+        )
+        conn.execute("UPDATE race SET race_date = '2026-01-01' WHERE season = 2026")
+
+    subprocess.run(
+        [sys.executable, "update_races_date.py", db_uri],
+        cwd=ROOT_DIR,
+        env=env,
+        check=True,
+        capture_output=True,
+    )
+
+    with sqlite3.connect(tmp_path / "update.sqlite3") as conn:
+        races = conn.execute(
+            "SELECT season, race_date FROM race WHERE ext_id = 'albert_park' "
+            "ORDER BY season"
+        ).fetchall()
+    assert races == [(2019, "2019-03-17"), (2026, "2026-03-08 04:00:00.000000")]
+
+
+def test_seed_keeps_results(app):
+    schedule = _fixture("2026.json")
+    drivers = _fixture("2026/drivers.json")["MRData"]["DriverTable"]["Drivers"]
+    teams = _fixture("2026/constructors.json")["MRData"]["ConstructorTable"][
+        "Constructors"
+    ]
+    init_db.seed(schedule, drivers, teams)
+    db.session.commit()
+    race = db.session.query(Race).filter_by(round=1).one()
+    stmt = update(RaceResult).where(
+        RaceResult.race_id == race.id, RaceResult.type == "QUALI"
+    )
+    db.session.execute(stmt.values(value="VER"))
+    db.session.commit()
+
+    # race postponed by a week
+    race_data = schedule["MRData"]["RaceTable"]["Races"][0]
+    race_data["date"] = "2026-03-15"
+    init_db.seed(schedule, drivers, teams)
+    db.session.commit()
+
+    db.session.refresh(race)
+    assert race.race_date == datetime(2026, 3, 15, 4)
+    assert db.session.query(Race).count() == 2
+    assert db.session.query(Competitor).count() == 10
+    results = db.session.query(RaceResult).filter_by(race_id=race.id).all()
+    assert len(results) == 8
+    assert [r.value for r in results if r.type == "QUALI"] == ["VER"]
+
+
+def test_seed_refuses_moved_round(app):
+    schedule = _fixture("2026.json")
+    init_db.seed(schedule, [], [])
+    db.session.commit()
+
+    # round 1 cancelled, rounds renumbered
+    races = schedule["MRData"]["RaceTable"]["Races"]
+    races[1]["round"] = "1"
+    changed = "round 1: albert_park -> shanghai"
+    with pytest.raises(init_db.ScheduleChanged, match=changed):
+        init_db.seed({"MRData": {"RaceTable": {"Races": races[1:]}}}, [], [])
+    db.session.rollback()
+
+    races = db.session.query(Race).order_by(Race.round).all()
+    assert [(race.round, race.ext_id) for race in races] == [
+        (1, "albert_park"),
+        (2, "shanghai"),
+    ]
@@ -0,0 +1,132 @@
+from datetime import timedelta
+
+import pytest
+
+from app import db
+from app.ingest import FIRST_POLL, SCHEDULE_INTERVAL, schedule_result_ingestion
+from app.jobs import (
+    DONE,
+    FAILED,
+    QUEUED,
+    enqueue,
+    run_pending,
+    schedule_periodic,
+    utcnow,
+)
+from app.models import Job, RaceResult
+from tests.conftest import RACE_RESULTS, add_bets, add_race, add_results, add_user
+
+RACE = {"first": "VER", "second": "NOR", "third": "LEC", "fastest_lap": "HAM"}
+
+
+@pytest.fixture
+def race(app):
+    # qualifying and race are both over
+    race = add_race(race_date=utcnow() - timedelta(hours=3))
+    add_results(race, {key: None for key in RACE_RESULTS})
+    return race
+
+
+@pytest.fixture
+def published(monkeypatch):
+    results = {}
+    monkeypatch.setattr(
+        "app.ingest.get_session_result",
+        lambda round, session: results.get(session),
+    )
+    return results
+
+
+def _jobs():
+    stmt = db.select(Job).where(Job.name == "ingest_results")
+    return {job.args["session"]: job for job in db.session.scalars(stmt)}
+
+
+def test_schedule_result_ingestion(race):
+    upcoming = add_race(round=2, race_date=utcnow() + timedelta(days=7))
+    add_race(round=3, race_date=utcnow() - timedelta(days=10))
+
+    assert schedule_result_ingestion() == 4
+    db.session.commit()
+    assert schedule_result_ingestion() == 4
+
+    jobs = db.session.query(Job).order_by(Job.run_at).all()
+    assert len(jobs) == 4
+    assert [(job.args["external_circuit_id"], job.args["session"]) for job in jobs] == [
+        ("circuit_1", "QUALI"),
+        ("circuit_1", "RACE"),
+        ("circuit_2", "QUALI"),
+        ("circuit_2", "RACE"),
+    ]
+    # ended sessions are polled right away, upcoming after they end
+    assert jobs[1].run_at <= utcnow()
+    run_at = upcoming.race_date + timedelta(hours=2) + FIRST_POLL
+    assert abs(jobs[3].run_at - run_at) < timedelta(seconds=1)
+
+
+def test_schedule_skips_loaded_session(race):
+    db.session.query(RaceResult).filter_by(type="QUALI").update({"value": "VER"})
+
+    schedule_result_ingestion()
+
+    assert list(_jobs()) == ["RACE"]
+
+
+def test_ingest_backoff_until_published(race, published):
+    user = add_user("alice")
+    add_bets(user, race, {("QUALI", None): "VER", ("RACE", 1): "VER"})
+    schedule_result_ingestion()
+    db.session.commit()
+
+    assert run_pending() == 2
+    jobs = _jobs()
+    assert {job.status for job in jobs.values()} == {QUEUED}
+    assert jobs["RACE"].run_at > utcnow()
+    assert "not published" in jobs["RACE"].error
+
+    published["QUALI"] = {"quali": "VER"}
+    published["RACE"] = RACE
+    for job in jobs.values():
+        job.run_at = utcnow()
+    db.session.commit()
+
+    assert run_pending() == 2
+    assert {job.status for job in jobs.values()} == {DONE}
+    assert jobs["RACE"].attempts == 2
+    values = {(r.type, r.rank): r.value for r in db.session.query(RaceResult)}
+    assert values[("RACE", 1)] == "VER"
+    assert values[("FASTEST", None)] == "HAM"
+    assert sorted(bet.result for bet in user.bets) == [1, 2]
+
+
+def test_ingest_gives_up(race, published, monkeypatch):
+    monkeypatch.setattr("app.jobs.RETRY_MAX_ATTEMPTS", 1)
+    schedule_result_ingestion()
+    db.session.commit()
+
+    run_pending()
+
+    assert {job.status for job in _jobs().values()} == {FAILED}
+
+
+def test_ingestion_scheduled_periodically(app):
+    add_race(race_date=utcnow() + timedelta(days=7))
+    schedule_periodic()
+
+    assert run_pending() == 1
+
+    assert sorted(_jobs()) == ["QUALI", "RACE"]
+    stmt = db.select(Job).where(Job.name == "schedule_results").order_by(Job.id)
+    done, queued = db.session.scalars(stmt)
+    assert (done.status, done.result["sessions"]) == (DONE, 2)
+    assert queued.status == QUEUED
+    assert abs(queued.run_at - utcnow() - SCHEDULE_INTERVAL) < timedelta(seconds=5)
+
+
+def test_ingest_race_removed(app):
+    job = enqueue("ingest_results", external_circuit_id="gone", session="RACE")
+    db.session.commit()
+
+    run_pending()
+
+    assert (job.status, job.result["status"]) == (DONE, "no race")
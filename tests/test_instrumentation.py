@@ -0,0 +1,54 @@
+import json
+import logging
+from datetime import datetime
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app import db
+from app.factory import create_app
+from tests.conftest import add_race, add_user, login
+
+
+@pytest.fixture
+def instrumented_client(monkeypatch):
+    monkeypatch.delenv("F1TEST", raising=False)
+    monkeypatch.setenv("F1_INSTRUMENTATION", "1")
+    flask_app = create_app("sqlite://")
+    with flask_app.app_context():
+        db.create_all()
+        yield flask_app.test_client()
+        db.session.remove()
+        db.drop_all()
+
+
+def _statements_total(endpoint):
+    labels = {"endpoint": endpoint}
+    return REGISTRY.get_sample_value("f1_db_statements_total", labels) or 0
+
+
+def test_server_timing(instrumented_client, caplog):
+    race = add_race(race_date=datetime(2100, 1, 1))
+    login(instrumented_client, add_user("alice"))
+
+    statements = _statements_total("main.race")
+    with caplog.at_level(logging.INFO, logger="app.instrumentation"):
+        response = instrumented_client.get(f"/race/{race.ext_id}")
+
+    header = response.headers["Server-Timing"]
+    assert header.startswith("app;dur=")
+    assert "tpl;dur=" in header
+    record = json.loads(caplog.records[-1].getMessage())
+    assert record["endpoint"] == "main.race"
+    assert record["status"] == 200
+    assert record["sql_count"] >= 3
+    assert f'"{record["sql_count"]} queries"' in header
+    assert record["template_time"] > 0
+    # same statements as counted by metrics
+    assert _statements_total("main.race") - statements == record["sql_count"]
+
+
+def test_disabled_by_default(client):
+    response = client.get("/health")
+
+    assert "Server-Timing" not in response.headers
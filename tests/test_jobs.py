@@ -0,0 +1,171 @@
+import threading
+from datetime import timedelta
+
+import pytest
+
+from app import db
+from app.jobs import (
+    DONE,
+    FAILED,
+    LEASE,
+    QUEUED,
+    RETRY_MAX_ATTEMPTS,
+    RUNNING,
+    TASKS,
+    enqueue,
+    run_pending,
+    start_worker_thread,
+    stop_worker_thread,
+    task,
+    utcnow,
+)
+from app.models import Job, RaceResult
+from tests.conftest import add_race, add_results, add_user, login
+
+
+@pytest.fixture
+def tasks(monkeypatch):
+    monkeypatch.setattr("app.jobs.TASKS", dict(TASKS))
+
+    @task("add")
+    def add(a, b):
+        return {"sum": a + b}
+
+    @task("fail")
+    def fail():
+        raise ValueError("no luck")
+
+
+def test_enqueue_dedupes_by_key(app, tasks):
+    first = enqueue("add", key="sum", a=1, b=2)
+    assert enqueue("add", key="sum", a=3, b=4) is first
+    assert enqueue("add", a=3, b=4) is not first
+    db.session.commit()
+    assert db.session.query(Job).count() == 2
+
+
+def test_enqueue_unknown_task(app):
+    with pytest.raises(KeyError):
+        enqueue("nope")
+
+
+def test_run_pending(app, tasks):
+    ok = enqueue("add", key="sum", a=1, b=2)
+    failed = enqueue("fail")
+    later = enqueue("add", delay=timedelta(hours=1), a=1, b=1)
+    db.session.commit()
+
+    assert run_pending() == 2
+
+    assert (ok.status, ok.result, ok.attempts) == (DONE, {"sum": 3}, 1)
+    assert failed.status == FAILED
+    assert "no luck" in failed.error
+    assert later.status == QUEUED
+    # finished job doesn't block the same key any more
+    assert enqueue("add", key="sum", a=0, b=0) is not ok
+
+
+def test_stale_running_job_is_requeued(app, tasks):
+    lost = enqueue("add", key="sum", a=1, b=2)
+    given_up = enqueue("add", a=2, b=2)
+    running = enqueue("add", a=3, b=3)
+    db.session.commit()
+    started = utcnow() - LEASE - timedelta(minutes=1)
+    for job, attempts in ((lost, 1), (given_up, RETRY_MAX_ATTEMPTS)):
+        job.status, job.started_at, job.attempts = RUNNING, started, attempts
+    running.status, running.started_at, running.attempts = RUNNING, utcnow(), 1
+    db.session.commit()
+
+    assert run_pending() == 1
+
+    db.session.expire_all()
+    assert (lost.status, lost.result, lost.attempts) == (DONE, {"sum": 3}, 2)
+    assert given_up.status == FAILED
+    assert "worker lost" in given_up.error
+    assert running.status == RUNNING
+
+
+def test_stop_worker_thread_waits_for_job(app, tasks):
+    started, release, finished = threading.Event(), threading.Event(), []
+
+    @task("slow")
+    def slow():
+        started.set()
+        release.wait(5)
+        finished.append(True)
+
+    enqueue("slow")
+    db.session.commit()
+    thread, _ = start_worker_thread(app)
+    assert started.wait(5)
+    threading.Timer(0.1, release.set).start()
+
+    stop_worker_thread(app, timeout=5)
+
+    assert finished == [True]
+    assert not thread.is_alive()
+    assert "jobs_worker" not in app.extensions
+
+
+def test_job_status_route(app, client, tasks):
+    login(client, add_user("admin", role="ADMIN"))
+    job = enqueue("add", a=1, b=2)
+    db.session.commit()
+    job = enqueue("add", a=1, b=2)
+    db.session.commit()
+    run_pending()
+
+    response = client.get(f"/jobs/{job.id}")
+
+    assert response.json["status"] == DONE
+    assert response.json["result"] == {"sum": 3}
+    assert client.get("/jobs/999").status_code == 404
+
+
+@pytest.mark.parametrize(
+    "path", ["/jobs/1", "/compute_season", "/guess_overview/season/load"]
+)
+def test_admin_only(app, client, tasks, path):
+    login(client, add_user("alice"))
+    enqueue("add", a=1, b=2)
+    db.session.commit()
+
+    # admin only, status of job shows its args, result and error
+    with pytest.raises(Exception):
+        client.get(path)
+    assert db.session.query(Job).count() == 1
+
+
+def test_load_results_is_queued(app, client, monkeypatch):
+    race = add_race()
+    add_results(race, {("QUALI", None): None})
+    login(client, add_user("admin", role="ADMIN"))
+    calls = []
+    monkeypatch.setattr(
+        "app.main.get_result_for_round",
+        lambda round, is_sprint: calls.append(round) or {"quali": "VER"},
+    )
+
+    response = client.post(f"/result/{race.ext_id}", data={"bonus": "yes"})
+
+    assert response.status_code == 302
+    assert calls == []
+    job = db.session.query(Job).one()
+    assert job.args["manual"]["bonus"] == "yes"
+
+    assert run_pending() == 1
+    assert job.status == DONE
+    assert calls == [1]
+    values = {r.type: r.value for r in db.session.query(RaceResult)}
+    assert values["QUALI"] == "VER"
+    assert values["BONUS"] == "yes"
+
+
+def test_no_worker(app, client):
+    app.config["JOBS_EXTERNAL_WORKER"] = False
+    login(client, add_user("admin", role="ADMIN"))
+
+    response = client.get("/compute_season")
+
+    assert response.status_code == 503
+    assert db.session.query(Job).count() == 0
@@ -0,0 +1,87 @@
+import json
+import re
+from datetime import datetime
+
+from tests.conftest import add_bets, add_race, add_teams, add_user, login
+
+
+def _template_data(response, name):
+    match = re.search(rf"{name} = (.*)\n", response.get_data(as_text=True))
+    return json.loads(match.group(1))
+
+
+def test_bet_result_hides_unlocked_bets_of_others(app, client):
+    race = add_race(race_date=datetime(2100, 1, 1))
+    alice = add_user("alice")
+    bob = add_user("bob")
+    add_user("carol")  # no bets
+    add_bets(alice, race, {("RACE", 1): "VER", ("QUALI", None): None})
+    add_bets(bob, race, {("RACE", 1): "NOR"}, extra="JOKER")
+    login(client, alice)
+
+    response = client.get(f"/bet_result/{race.ext_id}")
+
+    users = _template_data(response, "users_results")
+    assert [user["username"] for user in users] == ["alice", "bob", "carol"]
+    assert users[0]["bets"] == [
+        {"type": "RACE_1", "points": 0.0, "value": "VER", "extra": None},
+        {"type": "QUALI", "points": 0.0, "value": None, "extra": None},
+    ]
+    assert users[1]["bets"] == [
+        {"type": "RACE_1", "points": 0.0, "value": "LOCKED", "extra": "JOKER"},
+    ]
+    assert users[2]["bets"] == []
+
+
+def test_bet_result_shows_locked_bets_of_others(app, client):
+    race = add_race(race_date=datetime(2000, 1, 1))
+    alice = add_user("alice")
+    bob = add_user("bob")
+    add_bets(bob, race, {("RACE", 1): "NOR"})
+    login(client, alice)
+
+    response = client.get(f"/bet_result/{race.ext_id}")
+
+    users = _template_data(response, "users_results")
+    assert users[1]["bets"][0]["value"] == "NOR"
+
+
+def _bets(user):
+    return {(bet.type, bet.rank): (bet.value, bet.extra) for bet in user.bets}
+
+
+def test_race_post_upserts_bets(app, client):
+    race = add_race(race_date=datetime(2100, 1, 1))
+    alice = add_user("alice")
+    login(client, alice)
+
+    client.post(f"/race/{race.ext_id}", data={"first": "VER", "quali": "NOR"})
+    client.post(f"/race/{race.ext_id}", data={"first": "LEC", "joker": "on"})
+
+    bets = _bets(alice)
+    assert len(bets) == 9
+    assert bets[("RACE", 1)] == ("LEC", "JOKER")
+    assert bets[("QUALI", None)] == (None, None)
+
+
+def test_season_post_keeps_team_match(app, client):
+    add_teams()
+    alice = add_user("alice")
+    login(client, alice)
+    add_bets(alice, None, {("SEASON_DRIVER", 1): "VER"}, extra="MATCH OK")
+
+    client.post("/season", data={"select_driver_1": "NOR", "select_team_1": "x"})
+
+    bets = _bets(alice)
+    assert len(bets) == 33
+    assert bets[("SEASON_DRIVER", 1)] == ("NOR", "MATCH OK")
+    assert bets[("SEASON_TEAM", 1)] == ("x", None)
+
+
+def test_race_country_flag(app, client):
+    race = add_race(race_date=datetime(2100, 1, 1))  # country_code not set
+    login(client, add_user("alice"))
+
+    response = client.get(f"/race/{race.ext_id}")
+
+    assert 'class="fi fi-au"' in response.get_data(as_text=True)
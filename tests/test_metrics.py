@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+
+from tests.conftest import add_user, login
+
+ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
+
+
+def _sample(text, name):
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.split()[-1])
+    return None
+
+
+def test_metrics(app, client):
+    login(client, add_user("alice", role="ADMIN"))
+    client.get("/health")
+    client.get("/top_players")
+
+    text = client.get("/metrics").get_data(as_text=True)
+
+    assert (
+        _sample(
+            text,
+            'f1_request_duration_seconds_count{endpoint="main.health",method="GET",status="200"}',
+        )
+        >= 1
+    )
+    assert _sample(text, 'f1_db_statements_total{endpoint="main.top_players"}') >= 1
+
+
+def test_metrics_restricted(app, client, monkeypatch):
+    assert client.get("/metrics").status_code == 401
+    login(client, add_user("alice"))
+    assert client.get("/metrics").status_code == 401
+
+    monkeypatch.setenv("METRICS_TOKEN", "secret")
+    assert client.get("/metrics").status_code == 401
+    headers = {"Authorization": "Bearer wrong"}
+    assert client.get("/metrics", headers=headers).status_code == 401
+    headers = {"Authorization": "Bearer secret"}
+    assert client.get("/metrics", headers=headers).status_code == 200
+
+
+# each request in separate process, like gunicorn workers
+WORKER = """
+from app.factory import create_app
+app = create_app("sqlite://")
+headers = {"Authorization": "Bearer secret"}
+print(app.test_client().get(%r, headers=headers).get_data(as_text=True))
+"""
+
+
+def test_metrics_aggregated_from_processes(tmp_path):
+    env = dict(
+        os.environ, PROMETHEUS_MULTIPROC_DIR=str(tmp_path), METRICS_TOKEN="secret"
+    )
+    env.pop("F1TEST", None)
+
+    def run(path):
+        return subprocess.run(
+            [sys.executable, "-c", WORKER % path],
+            cwd=ROOT_DIR,
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+
+    run("/health")
+    run("/health")
+    text = run("/metrics")
+
+    assert (
+        _sample(
+            text,
+            'f1_request_duration_seconds_count{endpoint="main.health",method="GET",status="200"}',
+        )
+        == 2
+    )
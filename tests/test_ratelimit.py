@@ -0,0 +1,78 @@
+import pytest
+import requests
+
+from app.ergast_client.client import Client
+from app.ergast_client.ratelimit import RateLimiter
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_burst_without_waiting():
+    clock = FakeClock()
+    limiter = RateLimiter(burst=4, rate=0.5, clock=clock)
+
+    assert [limiter.reserve() for _ in range(4)] == [0, 0, 0, 0]
+
+
+def test_wait_for_refill():
+    clock = FakeClock()
+    limiter = RateLimiter(burst=2, rate=0.5, clock=clock, sleep=clock.sleep)
+
+    for _ in range(4):
+        limiter.acquire()
+
+    assert clock.sleeps == [2.0, 2.0]
+
+    clock.now += 10
+    limiter.acquire()
+    limiter.acquire()
+    assert clock.sleeps == [2.0, 2.0]
+
+
+def test_block():
+    clock = FakeClock()
+    limiter = RateLimiter(burst=4, rate=1, clock=clock)
+
+    limiter.block(30)
+
+    assert limiter.reserve() == 30
+    clock.now += 30
+    assert limiter.reserve() == 0
+
+
+def _response(status, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    response._content = b'{"MRData": {}}'
+    return response
+
+
+@pytest.mark.parametrize(
+    "headers, blocked",
+    [
+        ({"Retry-After": "20"}, 20),
+        ({"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}, 0),
+        ({}, 2),
+    ],
+)
+def test_too_many_requests_blocks_limiter(headers, blocked):
+    clock = FakeClock()
+    limiter = RateLimiter(burst=4, rate=0.5, clock=clock)
+
+    with Client("http://localhost/", rate_limiter=limiter) as client:
+        with pytest.raises(requests.HTTPError):
+            client._unpack_response(_response(429, headers))
+
+    assert limiter.reserve() == blocked
@@ -1,3 +1,6 @@
+from more_executors.futures import f_return
+
+from app import results
 from app.results import eval_bet
 from app.models import RaceResult, Bet
 
@@ -73,3 +76,48 @@ def test_eval_bet_podium_joker():
     result_map = {"QUALI": RaceResult.from_data(data)}
     bet_result = eval_bet(bet, result_map)
     assert bet_result == 1
+
+
+def _session_data(key, codes):
+    results = [{"position": str(i), "Driver": {"code": code}} for i, code in enumerate(codes, 1)]
+    return {"MRData": {"RaceTable": {"Races": [{key: results}]}}}
+
+
+class FakeClient:
+    def __init__(self, url=None):
+        self.calls = []
+
+    def _get(self, name, data):
+        self.calls.append(name)
+        return f_return(data)
+
+    def get_q_result(self, round):
+        return self._get("quali", _session_data("QualifyingResults", ["NOR", "VER"]))
+
+    def get_sprint_result(self, round):
+        return self._get("sprint", _session_data("SprintResults", ["PIA", "VER"]))
+
+    def get_fastest_lap(self, round):
+        return self._get("fastest", _session_data("Results", ["HAM"]))
+
+    def get_result(self, round):
+        return self._get("race", _session_data("Results", ["VER", "NOR", "LEC", "HAM"]))
+
+
+def test_get_result_for_round(monkeypatch):
+    monkeypatch.setattr(results, "get_ergast_client", FakeClient)
+
+    assert results.get_result_for_round(1) == {
+        "quali": "NOR",
+        "fastest_lap": "HAM",
+        "first": "VER",
+        "second": "NOR",
+        "third": "LEC",
+        "podium": ["VER", "NOR", "LEC"],
+    }
+
+
+def test_get_result_for_round_sprint(monkeypatch):
+    monkeypatch.setattr(results, "get_ergast_client", FakeClient)
+
+    assert results.get_result_for_round(1, is_sprint=True)["sprint"] == "PIA"
@@ -0,0 +1,237 @@
+from sqlalchemy import select
+
+from app import db
+from app.main import compute_season_task, get_season_positions
+from app.models import Bet, Competitor, UserStanding
+from app import scoring
+from app.scoring import score_race, score_season, score_season_changes
+from tests.conftest import (
+    RACE_RESULTS,
+    add_bets,
+    add_race,
+    add_results,
+    add_user,
+    login,
+)
+
+
+def _results(user):
+    stmt = select(Bet).where(Bet.user_id == user.id)
+    return {
+        (bet.type, bet.rank): bet.result for bet in db.session.scalars(stmt).all()
+    }
+
+
+def test_score_race(app):
+    race = add_race()
+    add_results(race, RACE_RESULTS)
+    alice = add_user("alice")
+    bob = add_user("bob")
+    add_bets(alice, race, RACE_RESULTS)
+    add_bets(
+        bob,
+        race,
+        {
+            ("QUALI", None): "NOR",
+            ("RACE", 1): "NOR",
+            ("RACE", 2): None,
+            ("BONUS", None): "wrong",
+        },
+        extra="JOKER",
+    )
+
+    report = score_race(race, bonus_ok_user_ids={alice.id})
+
+    assert report.bets == 12
+    assert report.rows == 9
+    assert _results(alice) == {
+        ("QUALI", None): 1,
+        ("RACE", 1): 2,
+        ("RACE", 2): 1,
+        ("RACE", 3): 1,
+        ("SC", None): 1,
+        ("FASTEST", None): 1,
+        ("BONUS", None): 2,
+        ("DRIVERDAY", None): 1,
+    }
+    assert _results(bob) == {
+        ("QUALI", None): 0,
+        ("RACE", 1): 1,  # podium with joker
+        ("RACE", 2): 0,
+        ("BONUS", None): 0,
+    }
+
+
+def test_score_race_writes_only_changes(app):
+    race = add_race()
+    add_results(race, RACE_RESULTS)
+    alice = add_user("alice")
+    add_bets(alice, race, RACE_RESULTS)
+
+    assert score_race(race).rows == 7
+    assert score_race(race).rows == 0
+
+
+def test_score_race_scored_concurrently(app, monkeypatch):
+    race = add_race()
+    add_results(race, RACE_RESULTS)
+    alice = add_user("alice")
+    add_bets(alice, race, RACE_RESULTS)
+    race_bets = scoring._race_bets
+    interleaved = []
+
+    def read_then_scored_by_other(race_id):
+        bets = race_bets(race_id)
+        if not interleaved:
+            # the other scoring (e.g. job) runs after the bets were read
+            interleaved.append(None)
+            interleaved[0] = score_race(race)
+        return bets
+
+    monkeypatch.setattr(scoring, "_race_bets", read_then_scored_by_other)
+
+    report = score_race(race)
+
+    assert interleaved[0].rows == 7
+    assert report.rows == 0
+    assert db.session.get(UserStanding, alice.id).race_points == 8
+
+
+def test_score_race_skips_sprint_for_normal_race(app):
+    race = add_race()
+    add_results(race, RACE_RESULTS)
+    alice = add_user("alice")
+    add_bets(alice, race, {("SPRINT", None): "VER"})
+
+    report = score_race(race)
+
+    assert report.rows == 0
+    assert _results(alice) == {("SPRINT", None): 0}
+
+
+def test_evaluate_result_post(app, client):
+    race = add_race()
+    add_results(race, RACE_RESULTS)
+    admin = add_user("admin", role="ADMIN")
+    add_bets(admin, race, {("RACE", 1): "VER", ("BONUS", None): "answer"})
+    login(client, admin)
+
+    response = client.post(
+        f"/result/{race.ext_id}/evaluate", data={str(admin.id): "on"}
+    )
+
+    assert response.status_code == 200
+    assert _results(admin) == {("RACE", 1): 2, ("BONUS", None): 2}
+
+
+def _season(user):
+    stmt = select(Bet).where(Bet.user_id == user.id, Bet.race_id.is_(None))
+    return {
+        (bet.type, bet.rank): (bet.result, bet.extra)
+        for bet in db.session.scalars(stmt).all()
+    }
+
+
+def test_score_season(app):
+    alice = add_user("alice")
+    bob = add_user("bob")
+    add_bets(
+        alice,
+        None,
+        {
+            ("SEASON_DRIVER", 1): "VER",
+            ("SEASON_DRIVER", 2): "NOR",
+            ("SEASON_DRIVER", 3): "PIA",
+            ("SEASON_TEAM", 1): "McLaren",
+            ("SEASON_TEAM", 2): "Ferrari",
+        },
+    )
+    add_bets(
+        bob,
+        None,
+        {
+            ("SEASON_DRIVER", 1): "PIA",
+            ("SEASON_DRIVER", 2): "VER",
+            ("SEASON_DRIVER", 3): "NOR",
+            ("SEASON_TEAM", 1): "Ferrari",
+        },
+    )
+    drivers = {"VER": 1, "NOR": 2, "PIA": 3}
+    teams = {"Ferrari": 1, "McLaren": 2}
+
+    report = score_season(drivers, teams, [("PIA", "NOR"), ("VER", "HAD")])
+
+    assert report.bets == 9
+    assert _season(alice) == {
+        ("SEASON_DRIVER", 1): (12, None),
+        ("SEASON_DRIVER", 2): (2, "MATCH OK"),
+        ("SEASON_DRIVER", 3): (2, "MATCH OK"),
+        ("SEASON_TEAM", 1): (0, None),
+        ("SEASON_TEAM", 2): (0, None),
+    }
+    assert _season(bob) == {
+        ("SEASON_DRIVER", 1): (0, "MATCH NOT OK"),
+        ("SEASON_DRIVER", 2): (0, None),
+        ("SEASON_DRIVER", 3): (0, "MATCH NOT OK"),
+        ("SEASON_TEAM", 1): (7, None),
+    }
+    assert db.session.get(UserStanding, alice.id).season_points == 17
+    assert db.session.get(UserStanding, bob.id).season_points == 7
+
+    # standings changed, previous hits are reset
+    report = score_season({"NOR": 1, "VER": 2, "PIA": 3}, teams, [("PIA", "NOR")])
+
+    assert _season(alice)[("SEASON_DRIVER", 1)] == (0, None)
+    assert db.session.get(UserStanding, alice.id).season_points == 3
+    assert report.rows == 3
+
+
+def test_score_season_changes(app):
+    users = [add_user(name) for name in ("alice", "bob")]
+    for user, order in zip(users, (["VER", "NOR", "PIA"], ["NOR", "PIA", "VER"])):
+        bets = {("SEASON_DRIVER", rank): code for rank, code in enumerate(order, 1)}
+        add_bets(user, None, {**bets, ("SEASON_TEAM", 1): "McLaren"})
+    pairs = [("PIA", "NOR")]
+    before = ({"VER": 1, "NOR": 2, "PIA": 3}, {"McLaren": 1, "Ferrari": 2})
+    score_season(*before, pairs)
+    # NOR and PIA swapped, teams unchanged
+    after = ({"VER": 1, "NOR": 3, "PIA": 2}, {"McLaren": 1, "Ferrari": 2})
+
+    report = score_season_changes(before, after, pairs)
+
+    assert report.bets == 4  # NOR and PIA bets only
+    projected = [_season(user) for user in users]
+    score_season(*after, pairs)
+    assert [_season(user) for user in users] == projected
+    assert db.session.get(UserStanding, users[1].id).season_points == 7 + 2
+
+
+def test_compute_season_real_team_names(app):
+    teams = [("audi", "Audi"), ("cadillac", "Cadillac F1 Team"), ("mclaren", "McLaren")]
+    db.session.add_all(
+        Competitor(ext_id=ext_id, name=name, code="", type="TEAM", position=pos)
+        for pos, (ext_id, name) in enumerate(teams, start=1)
+    )
+    alice = add_user("alice")
+    add_bets(
+        alice,
+        None,
+        {
+            ("SEASON_TEAM", 1): "Audi",
+            ("SEASON_TEAM", 2): "Cadillac F1 Team",
+            ("SEASON_TEAM", 3): "Ferrari",
+        },
+    )
+
+    assert get_season_positions()[1] == {
+        "Audi": 1,
+        "Cadillac F1 Team": 2,
+        "McLaren": 3,
+    }
+    compute_season_task()
+
+    assert _results(alice) == {
+        ("SEASON_TEAM", 1): 7,
+        ("SEASON_TEAM", 2): 2,
+        ("SEASON_TEAM", 3): 0,
+    }
@@ -0,0 +1,145 @@
+from sqlalchemy import update
+
+from app import db
+from app.models import User, UserStanding
+from app.scoring import score_race
+from app.standings import (
+    apply_standings_delta,
+    get_leaderboard,
+    get_standings,
+    rebuild_standings,
+    rebuild_standings_command,
+)
+from tests.conftest import (
+    RACE_RESULTS,
+    add_bets,
+    add_race,
+    add_results,
+    add_user,
+    login,
+)
+
+
+def _set_results(user, results):
+    for bet in user.bets:
+        bet.result, bet.extra = results[(bet.type, bet.rank)]
+    db.session.commit()
+
+
+def _league():
+    race = add_race()
+    alice = add_user("alice")
+    bob = add_user("bob")
+    add_user("carol")  # no bets
+    for user in (alice, bob):
+        add_bets(user, race, {("RACE", 1): "VER", ("QUALI", None): "VER"})
+        add_bets(user, None, {("SEASON_DRIVER", 1): "VER", ("SEASON_TEAM", 1): "x"})
+
+    _set_results(
+        alice,
+        {
+            ("RACE", 1): (2.0, None),
+            ("QUALI", None): (1.0, None),
+            ("SEASON_DRIVER", 1): (0.0, "MATCH OK"),
+            ("SEASON_TEAM", 1): (0.0, None),
+        },
+    )
+    _set_results(
+        bob,
+        {
+            ("RACE", 1): (0.5, "JOKER"),
+            ("QUALI", None): (0.0, None),
+            ("SEASON_DRIVER", 1): (12.0, "MATCH OK"),
+            ("SEASON_TEAM", 1): (2.0, None),
+        },
+    )
+
+
+def test_get_leaderboard(app):
+    _league()
+
+    data = get_leaderboard()
+
+    assert data == {
+        "RACES": [
+            {"username": "alice", "points": 3.0, "order": 1},
+            {"username": "bob", "points": 0.5, "order": 2},
+        ],
+        "SEASON": [
+            {"username": "bob", "points": 14.5, "order": 1},
+            {"username": "alice", "points": 0.5, "order": 2},
+        ],
+        "TOTAL": [
+            {"username": "bob", "points": 15.0, "order": 1},
+            {"username": "alice", "points": 3.5, "order": 2},
+        ],
+    }
+
+
+def test_rebuild_standings(app):
+    _league()
+
+    diffs = rebuild_standings()
+
+    assert diffs == [("alice", 0.0, 3.5), ("bob", 0.0, 15.0)]
+    assert get_standings() == get_leaderboard()
+    assert rebuild_standings() == []
+
+
+def test_rebuild_standings_command(app):
+    _league()
+
+    result = app.test_cli_runner().invoke(rebuild_standings_command)
+
+    assert "bob: stored 0.0, recomputed 15.0" in result.output
+    assert "2 differences found" in result.output
+
+
+def test_standings_updated_by_scoring(app):
+    _league()
+    rebuild_standings()
+    race = add_race(round=2)
+    add_results(race, RACE_RESULTS)
+    alice, bob = db.session.get(User, 1), db.session.get(User, 2)
+    add_bets(alice, race, RACE_RESULTS)
+    add_bets(bob, race, {("RACE", 1): "LEC"}, extra="JOKER")
+
+    score_race(race, bonus_ok_user_ids={alice.id})
+    score_race(race, bonus_ok_user_ids={alice.id})
+
+    assert get_standings() == get_leaderboard()
+    assert get_standings()["TOTAL"] == [
+        {"username": "bob", "points": 15.0 + 1, "order": 1},
+        {"username": "alice", "points": 3.5 + 10, "order": 2},
+    ]
+
+
+def test_apply_standings_delta_adds_to_stored_points(app):
+    alice, bob = add_user("alice"), add_user("bob")
+    apply_standings_delta({alice.id: [1.0, 0.0]})
+    db.session.commit()
+    standing = db.session.get(UserStanding, alice.id)
+    assert standing.total_points == 1.0
+
+    # scored concurrently after the standing was read
+    db.session.execute(
+        update(UserStanding.__table__).values(race_points=3.0, total_points=3.0)
+    )
+    apply_standings_delta({alice.id: [1.0, 2.0], bob.id: [0.5, 0.0]})
+    db.session.commit()
+
+    assert get_standings()["TOTAL"] == [
+        {"username": "alice", "points": 3.0 + 3.0, "order": 1},
+        {"username": "bob", "points": 0.5, "order": 2},
+    ]
+
+
+def test_top_players(app, client):
+    _league()
+    rebuild_standings()
+    login(client, add_user("dave"))
+
+    response = client.get("/top_players")
+
+    assert response.status_code == 200
+    assert b'"username": "bob"' in response.data
@@ -1,8 +1,11 @@
-from app import utils
+from app import db, utils
+from app.versioned_cache import bump_cache_version
 
 from datetime import datetime, timedelta, UTC
 import pytz
 
+from tests.conftest import add_race
+
 
 DATE_FMT = "%d.%m. %H:%M"
 
@@ -50,3 +53,44 @@ def test_date_or_none_shift():
 
     new_date = utils.date_or_none(date, shift=timedelta(hours=5))
     assert "01.01. 07:00" == new_date  # + 5 + change to CET
+
+
+def _add_schedule(*offsets):
+    now = datetime.now(UTC).replace(tzinfo=None)
+    return [
+        add_race(round=round, race_date=now + offset)
+        for round, offset in enumerate(offsets, start=1)
+    ]
+
+
+def test_get_current_race(app):
+    _add_schedule(timedelta(days=-14), timedelta(hours=-2), timedelta(days=7))
+
+    assert utils.get_current_race().ext_id == "circuit_2"
+
+
+def test_get_current_race_after_grace_period(app):
+    _add_schedule(timedelta(days=-14), timedelta(hours=-7), timedelta(days=7))
+
+    assert utils.get_current_race().ext_id == "circuit_3"
+
+
+def test_get_current_race_season_over(app):
+    _add_schedule(timedelta(days=-21), timedelta(days=-14), timedelta(days=-7))
+
+    assert utils.get_current_race().ext_id == "circuit_3"
+
+
+def test_get_current_race_schedule_invalidated(app):
+    races = _add_schedule(timedelta(days=-14), timedelta(hours=-2), timedelta(days=7))
+    assert utils.get_current_race().ext_id == "circuit_2"
+
+    races[1].race_date -= timedelta(days=1)
+    db.session.commit()
+    # not reloaded until the version changes
+    assert utils.get_current_race().ext_id == "circuit_2"
+
+    # bumped by other process, e.g. update_races_date.py
+    bump_cache_version("schedule")
+    db.session.commit()
+    assert utils.get_current_race().ext_id == "circuit_3"
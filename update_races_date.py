@@ -4,8 +4,10 @@ from app import db
 from app.factory import (
     create_app,
 )
-from app.ergast_client.client import Client
+from app.ergast_client.client import get_ergast_client
+from app.ingest import schedule_result_ingestion
 from app.models import Race
+from app.utils import SCHEDULE, _db_exec, current_races
 
 db_uri = None
 if len(sys.argv) == 2:
@@ -14,16 +16,23 @@ app = create_app(db_uri)
 
 with app.app_context():
     
-    with Client("https://api.jolpi.ca/") as client:
-        schedule = client.get_current_schedule().result()
-        new_race_data = Race.race_from_data(schedule)
+    client = get_ergast_client()
+    schedule = client.get_current_schedule().result()
+    new_race_data = Race.race_from_data(schedule)
         
-        existing_races_map = {race.ext_id:race for race in db.session.query(Race).all()}
+    # past seasons imported by backfill have the same circuits
+    existing_races_map = {
+        race.ext_id: race for race in _db_exec(current_races()).scalars()
+    }
 
-        for new_race in new_race_data:
-            race_in_db = existing_races_map[new_race.ext_id]
-            print(f"{race_in_db.ext_id}+{race_in_db.race_date}")
-            race_in_db.sprint_date = new_race.sprint_date
-            race_in_db.quali_date = new_race.quali_date
-            race_in_db.race_date = new_race.race_date
-        db.session.commit()
+    for new_race in new_race_data:
+        race_in_db = existing_races_map[new_race.ext_id]
+        print(f"{race_in_db.ext_id}+{race_in_db.race_date}")
+        race_in_db.sprint_date = new_race.sprint_date
+        race_in_db.quali_date = new_race.quali_date
+        race_in_db.race_date = new_race.race_date
+        race_in_db.country_code = new_race.country_code
+    SCHEDULE.invalidate()
+    # results of moved sessions are loaded at new time
+    schedule_result_ingestion()
+    db.session.commit()